@@ -2,95 +2,462 @@
 Sign Language Recognition - 3 Words (help, no, yes)
 Uses LSTM model trained on MediaPipe hand landmarks
 """
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
+from flask_sock import Sock
+from simple_websocket import ConnectionClosed
 import numpy as np
+import json
+import os
 import pickle
 import base64
+import binascii
+import threading
 import cv2
-import mediapipe as mp
-import tensorflow as tf
-from collections import deque
+from batcher import InferenceBatcher
+from features import compute_features, feature_dim, is_raw
+from inference import load_backend, StreamingLSTM
+from landmarks import HandROI, HandsPool, SessionTrackers, bgr_to_rgb, landmarks_into
+from metrics import Counter, StageTimers, render_prometheus, request_timings
+from sessions import MemorySessionStore, RedisSessionStore, SessionStateMap
+from streaming import LatestFrameSlot, prediction_changed, is_reset_message
 
 app = Flask(__name__)
+sock = Sock(app)
 
-# Load model
-model = tf.keras.models.load_model("models/sign_classifier.keras")
+# Buffer for sequence
+SEQUENCE_LENGTH = 30
+LANDMARK_DIM = 63  # 21 landmarks x (x, y, z)
+
+# Load model through the configured backend: keras, tf_function, tflite or numpy
+MODEL_PATH = "models/sign_classifier.keras"
+INFERENCE_BACKEND = os.environ.get('HANDLY_BACKEND', 'tf_function')
+# Map exported NumPy weights read-only so worker processes share one copy (see cluster.py)
+WEIGHTS_MMAP = os.environ.get('HANDLY_WEIGHTS_MMAP', '0') == '1'
+backend = load_backend(INFERENCE_BACKEND, MODEL_PATH, mmap=WEIGHTS_MMAP)
 with open("models/label_map.pkl", 'rb') as f:
     label_data = pickle.load(f)
 signs = label_data['signs']
+# Features the model was trained on (features.py); models saved without a spec take raw landmarks
+FEATURE_SPEC = label_data.get('features')
+FEATURE_DIM = feature_dim(FEATURE_SPEC)
 
-# MediaPipe
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(static_image_mode=True, max_num_hands=1, min_detection_confidence=0.5)
+# Micro-batching across sessions: wait at most BATCH_MAX_WAIT_MS for
+# up to BATCH_MAX_SIZE ready windows, then run one forward pass.
+# BATCH_MAX_SIZE=1 disables the batcher and predicts inline.
+BATCH_MAX_SIZE = int(os.environ.get('HANDLY_BATCH_MAX_SIZE', 32))
+BATCH_MAX_WAIT_MS = float(os.environ.get('HANDLY_BATCH_MAX_WAIT_MS', 5))
+batcher = None
+if BATCH_MAX_SIZE > 1:
+    batcher = InferenceBatcher(backend.predict, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS)
 
-# Buffer for sequence
-SEQUENCE_LENGTH = 30
-buffers = {}
+# Inference mode: 'window' re-runs the full 30-frame window through the
+# batcher; 'streaming' advances per-session LSTM state one frame at a time
+# (NumPy weights, exact for stride 1, see inference.StreamingLSTM)
+INFERENCE_MODE = os.environ.get('HANDLY_INFERENCE_MODE', 'window')
+STREAM_STRIDE = int(os.environ.get('HANDLY_STREAM_STRIDE', 1))
+streamer = None
+if INFERENCE_MODE == 'streaming':
+    numpy_backend = backend if backend.name == 'numpy' else load_backend('numpy', MODEL_PATH, mmap=WEIGHTS_MMAP)
+    streamer = StreamingLSTM(numpy_backend, window=SEQUENCE_LENGTH, stride=STREAM_STRIDE)
+elif INFERENCE_MODE != 'window':
+    raise ValueError(f"HANDLY_INFERENCE_MODE must be 'window' or 'streaming', got {INFERENCE_MODE!r}")
 
-def extract_landmarks(frame):
-    # No flip - model was trained on non-flipped videos
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(rgb)
-    
-    if results.multi_hand_landmarks:
-        hand = results.multi_hand_landmarks[0]
-        landmarks = []
-        for lm in hand.landmark:
-            landmarks.extend([lm.x, lm.y, lm.z])
-        return landmarks, True
-    return [0.0] * 63, False
+# MediaPipe: Hands instances are not thread-safe, so each request checks
+# one out of a bounded pool (defaults to one per core)
+HANDS_POOL_SIZE = int(os.environ.get('HANDLY_HANDS_POOL_SIZE', os.cpu_count() or 1))
+hands_pool = HandsPool(HANDS_POOL_SIZE, static_image_mode=True, max_num_hands=1, min_detection_confidence=0.5)
 
-@app.route('/')
-def index():
-    return render_template('index.html', signs=signs)
+# Live sessions get their own tracking-mode Hands (skips palm detection once
+# a hand is locked); HANDLY_LANDMARK_MODE=static uses the pool for every frame.
+# Past HANDLY_TRACKER_MAX_SESSIONS, new sessions use the pool until a tracker frees up
+LANDMARK_MODE = os.environ.get('HANDLY_LANDMARK_MODE', 'tracking')
+TRACKER_IDLE_TTL = float(os.environ.get('HANDLY_TRACKER_IDLE_TTL', 60))
+TRACKER_MAX_SESSIONS = int(os.environ.get('HANDLY_TRACKER_MAX_SESSIONS', 64))
+trackers = None
+if LANDMARK_MODE == 'tracking':
+    trackers = SessionTrackers(idle_ttl=TRACKER_IDLE_TTL, max_sessions=TRACKER_MAX_SESSIONS,
+                               fallback=hands_pool.process,
+                               max_num_hands=1, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+elif LANDMARK_MODE != 'static':
+    raise ValueError(f"HANDLY_LANDMARK_MODE must be 'tracking' or 'static', got {LANDMARK_MODE!r}")
 
-@app.route('/predict', methods=['POST'])
-def predict():
-    data = request.json
-    frame_data = data['frame']
-    session_id = data.get('session', 'default')
-    
-    if session_id not in buffers:
-        buffers[session_id] = deque(maxlen=SEQUENCE_LENGTH)
+# HANDLY_ROI=1 crops each session's frames to the previous hand's box plus a
+# margin before MediaPipe, falling back to the full frame when the hand is lost
+ROI_ENABLED = os.environ.get('HANDLY_ROI', '0') == '1'
+ROI_MARGIN = float(os.environ.get('HANDLY_ROI_MARGIN', 0.5))
+
+# Per-stage latency histograms and counters, exported on /metrics.
+# HANDLY_SERVER_TIMING=1 (or a request header X-Server-Timing: 1) adds a
+# Server-Timing header with the request's stage durations to /predict
+STAGES = ('base64', 'imdecode', 'cvtColor', 'hands', 'features', 'buffer', 'inference', 'serialize', 'total')
+STAGE_MS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+SERVER_TIMING = os.environ.get('HANDLY_SERVER_TIMING', '0') == '1'
+stage_timers = StageTimers(STAGES, STAGE_MS_BUCKETS)
+counters = {name: Counter() for name in ('frames', 'hand_detected', 'ready', 'not_ready', 'errors')}
+
+def timing_requested(headers):
+    return SERVER_TIMING or headers.get('X-Server-Timing') == '1'
+
+# Per-session landmark buffers: float32 rings with idle-TTL / LRU eviction,
+# in-process by default or in a Redis-compatible server for multi-process runs
+SESSION_STORE = os.environ.get('HANDLY_SESSION_STORE', 'memory')
+SESSION_IDLE_TTL = float(os.environ.get('HANDLY_SESSION_IDLE_TTL', 300))
+MAX_SESSIONS = int(os.environ.get('HANDLY_MAX_SESSIONS', 10000))
+MAX_SESSION_ID_LENGTH = 64
+
+# Streaming LSTM state and ROI boxes live in this process whatever the store,
+# so they are bounded by the same TTL and cap on their own
+stream_states = SessionStateMap(lambda: streamer.new_state(), idle_ttl=SESSION_IDLE_TTL, max_sessions=MAX_SESSIONS)
+rois = SessionStateMap(lambda: HandROI(margin=ROI_MARGIN), idle_ttl=SESSION_IDLE_TTL, max_sessions=MAX_SESSIONS)
+
+def drop_session_state(session_id):
+    """Release per-session state held outside the buffer store"""
+    stream_states.pop(session_id, None)
+    rois.pop(session_id, None)
+    if trackers is not None:
+        trackers.discard(session_id)
+
+if SESSION_STORE == 'memory':
+    sessions = MemorySessionStore(SEQUENCE_LENGTH, FEATURE_DIM, idle_ttl=SESSION_IDLE_TTL,
+                                  max_sessions=MAX_SESSIONS, on_evict=drop_session_state)
+elif SESSION_STORE == 'redis':
+    if streamer is not None:
+        raise ValueError("streaming inference keeps LSTM state in-process; use HANDLY_SESSION_STORE=memory")
+    sessions = RedisSessionStore(os.environ.get('HANDLY_REDIS_URL', 'redis://localhost:6379/0'),
+                                 SEQUENCE_LENGTH, FEATURE_DIM, idle_ttl=SESSION_IDLE_TTL)
+else:
+    raise ValueError(f"HANDLY_SESSION_STORE must be 'memory' or 'redis', got {SESSION_STORE!r}")
+
+# Per-thread landmark row that MediaPipe results are written into, so a
+# frame costs no list or array allocation before it is copied into the ring
+_scratch = threading.local()
+
+def landmark_row():
+    row = getattr(_scratch, 'row', None)
+    if row is None:
+        row = _scratch.row = np.zeros(LANDMARK_DIM, dtype=np.float32)
+    return row
+
+def to_rgb(image):
+    with stage_timers.time('cvtColor'):
+        return bgr_to_rgb(image)
+
+def extract_landmarks(frame, session_id=None):
+    # No flip - model was trained on non-flipped videos
+    if trackers is not None and session_id is not None:
+        mediapipe = lambda rgb: trackers.process(session_id, rgb)
+    else:
+        mediapipe = hands_pool.process
     
-    buffer = buffers[session_id]
+    def process(rgb):
+        with stage_timers.time('hands'):
+            return mediapipe(rgb)
     
-    # Decode image
-    img_bytes = base64.b64decode(frame_data.split(',')[1])
-    nparr = np.frombuffer(img_bytes, np.uint8)
-    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    row = landmark_row()
+    if ROI_ENABLED and session_id is not None:
+        roi = rois.get(session_id)
+        _, hand_detected = roi.process(process, frame, row, to_rgb=to_rgb)
+        return row, hand_detected
     
-    landmarks, hand_detected = extract_landmarks(frame)
-    buffer.append(landmarks)
+    results = process(to_rgb(frame))
+    hand_detected = landmarks_into(results, row)
+    return row, hand_detected
+
+def decode_image(frame_data):
+    """Data URL -> BGR frame; raises ValueError for anything that isn't a decodable image"""
+    if not isinstance(frame_data, str) or ',' not in frame_data:
+        raise ValueError("frame must be a data URL string")
+    with stage_timers.time('base64'):
+        try:
+            img_bytes = base64.b64decode(frame_data.split(',', 1)[1], validate=True)
+        except binascii.Error as e:
+            raise ValueError(f"frame is not valid base64: {e}") from None
+    if not img_bytes:
+        raise ValueError("frame is empty")
+    with stage_timers.time('imdecode'):
+        frame = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if frame is None or frame.size == 0:
+        raise ValueError("could not decode frame")
+    return frame
+
+def parse_landmarks(values):
+    """Validate client-side landmarks; an empty payload means no hand in view"""
+    if values is None or len(values) == 0:
+        row = landmark_row()
+        row.fill(0.0)
+        return row, False
+    arr = np.asarray(values, dtype=np.float32).reshape(-1)
+    if arr.size != LANDMARK_DIM or not np.all(np.isfinite(arr)):
+        raise ValueError(f"expected {LANDMARK_DIM} finite floats, got {arr.size}")
+    return arr, True
+
+def check_session_id(session_id):
+    if not isinstance(session_id, str) or not 0 < len(session_id) <= MAX_SESSION_ID_LENGTH:
+        raise ValueError(f"session must be a string of 1-{MAX_SESSION_ID_LENGTH} characters")
+    return session_id
+
+def read_input():
+    """
+    Decode a /predict request into (session_id, landmarks, hand_detected).
+
+    Three input contracts are accepted:
+      - application/octet-stream: 63 little-endian float32 (or an empty body
+        when no hand is visible), session passed as ?session=
+      - JSON {"landmarks": [63 floats] | null, "session": ...}
+      - JSON {"frame": "data:image/jpeg;base64,...", "session": ...}
+        (fallback: MediaPipe runs server-side)
+    """
+    if request.mimetype == 'application/octet-stream':
+        session_id = check_session_id(request.args.get('session', 'default'))
+        values = np.frombuffer(request.get_data(), dtype='<f4')
+        return (session_id, *parse_landmarks(values))
     
-    if len(buffer) == SEQUENCE_LENGTH:
-        X = np.array([list(buffer)])
-        pred = model.predict(X, verbose=0)
+    data = request.get_json(silent=True) or {}
+    session_id = check_session_id(data.get('session', 'default'))
+    if 'landmarks' in data:
+        return (session_id, *parse_landmarks(data['landmarks']))
+    if 'frame' in data:
+        frame = decode_image(data['frame'])
+        return (session_id, *extract_landmarks(frame, session_id))
+    raise ValueError("request needs 'frame' or 'landmarks'")
+
+def predict_window(window):
+    """Class probabilities for one full (30, FEATURE_DIM) window"""
+    with stage_timers.time('inference'):
+        if batcher is None:
+            return backend.predict(window[np.newaxis])[0]
+        return batcher.predict(window)
+
+def stream_step(session_id, landmarks):
+    """Advance the session's streaming state; returns the latest probabilities (None until a window completes)"""
+    state = stream_states.get(session_id)
+    with stage_timers.time('inference'), state.lock:
+        streamer.step(state, landmarks)
+        return state.last
+
+@app.route('/')
+def index():
+    mode = request.args.get('mode', 'image')
+    transport = request.args.get('transport', 'http')
+    return render_template('index.html', signs=signs, mode=mode, transport=transport)
+
+def buffer_frame(session_id, landmarks):
+    """
+    Append one frame to the session. Returns (window, buffer_size, pred):
+    in streaming mode pred is already computed, otherwise a full window is
+    returned for predict_window() (None while the buffer is filling).
+    """
+    if not is_raw(FEATURE_SPEC):
+        with stage_timers.time('features'):
+            landmarks = compute_features(landmarks, FEATURE_SPEC)
+    with stage_timers.time('buffer'):
+        window, buffer_size = sessions.append(session_id, landmarks)
+    if streamer is not None:
+        return None, buffer_size, stream_step(session_id, landmarks)
+    return window, buffer_size, None
+
+def format_result(pred, hand_detected, buffer_size):
+    # Every frame's response passes through here, so it is also where frames are counted
+    counters['frames'].inc()
+    if hand_detected:
+        counters['hand_detected'].inc()
+    counters['ready' if pred is not None else 'not_ready'].inc()
+    if pred is not None:
         idx = int(np.argmax(pred))
-        conf = float(pred[0][idx])
-        return jsonify({
+        conf = float(pred[idx])
+        return {
             'prediction': signs[idx],
             'confidence': conf,
             'hand_detected': hand_detected,
             'ready': True
-        })
+        }
     
-    return jsonify({
+    return {
         'prediction': None,
         'confidence': 0,
         'hand_detected': hand_detected,
         'ready': False,
-        'buffer_size': len(buffer)
-    })
+        'buffer_size': buffer_size
+    }
+
+def process_frame(session_id, landmarks, hand_detected):
+    """Buffer one frame for the session and return the response payload"""
+    window, buffer_size, pred = buffer_frame(session_id, landmarks)
+    if window is not None:
+        pred = predict_window(window)
+    return format_result(pred, hand_detected, buffer_size)
+
+def reset_session(session_id):
+    sessions.reset(session_id)
+    if trackers is not None:
+        trackers.discard(session_id)
+    roi = rois.peek(session_id)
+    if roi is not None:
+        roi.reset()
+    state = stream_states.peek(session_id)
+    if state is not None:
+        with state.lock:
+            state.reset()
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    with request_timings() as timings:
+        with stage_timers.time('total'):
+            try:
+                session_id, landmarks, hand_detected = read_input()
+            except (ValueError, TypeError) as e:
+                counters['errors'].inc()
+                return jsonify({'error': str(e)}), 400
+            result = process_frame(session_id, landmarks, hand_detected)
+            with stage_timers.time('serialize'):
+                response = jsonify(result)
+        if timing_requested(request.headers):
+            response.headers['Server-Timing'] = timings.header()
+    return response
 
 @app.route('/reset', methods=['POST'])
 def reset():
-    session_id = request.json.get('session', 'default')
-    if session_id in buffers:
-        buffers[session_id].clear()
+    try:
+        session_id = check_session_id((request.get_json(silent=True) or {}).get('session', 'default'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    reset_session(session_id)
     return jsonify({'status': 'ok'})
 
+# WebSocket stream: same inputs as /predict over one connection (?session=...)
+#   binary message - 63 little-endian float32, empty when no hand
+#   text message   - JSON {"landmarks": [...]}, {"frame": "data:..."} or {"type": "reset"}
+# Stale frames are dropped when inference falls behind, and a prediction
+# is pushed only when it changes.
+ws_lock = threading.Lock()
+ws_counters = {'connections': 0, 'active': 0, 'frames': 0, 'dropped': 0, 'pushed': 0}
+
+def count_ws(**deltas):
+    with ws_lock:
+        for key, delta in deltas.items():
+            ws_counters[key] += delta
+
+def decode_ws_message(message, session_id):
+    if isinstance(message, bytes):
+        return parse_landmarks(np.frombuffer(message, dtype='<f4'))
+    data = json.loads(message)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    if 'landmarks' in data:
+        return parse_landmarks(data['landmarks'])
+    if 'frame' in data:
+        frame = decode_image(data['frame'])
+        return extract_landmarks(frame, session_id)
+    raise ValueError("message needs 'frame' or 'landmarks'")
+
+def pump_messages(ws, slot):
+    """Reader thread: park incoming messages in the slot until the socket closes"""
+    try:
+        while True:
+            message = ws.receive()
+            if is_reset_message(message):
+                slot.request_reset()
+            else:
+                slot.put(message)
+    except ConnectionClosed:
+        pass
+    finally:
+        slot.close()
+
+@sock.route('/ws')
+def stream(ws):
+    try:
+        session_id = check_session_id(request.args.get('session', 'default'))
+    except ValueError as e:
+        ws.send(json.dumps({'error': str(e)}))
+        return
+    
+    slot = LatestFrameSlot()
+    threading.Thread(target=pump_messages, args=(ws, slot), daemon=True).start()
+    count_ws(connections=1, active=1)
+    last = None
+    try:
+        while True:
+            kind, message = slot.take()
+            if kind is None:
+                break
+            if kind == 'reset':
+                reset_session(session_id)
+                last = None
+                continue
+            try:
+                landmarks, hand_detected = decode_ws_message(message, session_id)
+            except (ValueError, TypeError) as e:
+                ws.send(json.dumps({'error': str(e)}))
+                continue
+            result = process_frame(session_id, landmarks, hand_detected)
+            if prediction_changed(last, result):
+                ws.send(json.dumps(result))
+                last = result
+                count_ws(pushed=1)
+    except ConnectionClosed:
+        pass
+    finally:
+        count_ws(active=-1, frames=slot.received, dropped=slot.dropped)
+
+def roi_stats():
+    totals = {'sessions': len(rois), 'evicted': rois.evicted, 'cropped': 0, 'full': 0, 'lost': 0}
+    for roi in rois.values():
+        for key, value in roi.stats().items():
+            totals[key] += value
+    return totals
+
+def server_stats():
+    return {
+        'sessions': sessions.stats(),
+        'backend': backend.name,
+        'batcher': batcher.stats() if batcher is not None else None,
+        'hands_pool': hands_pool.stats(),
+        'trackers': trackers.stats() if trackers is not None else None,
+        'roi': roi_stats() if ROI_ENABLED else None,
+        'websocket': dict(ws_counters),
+    }
+
+@app.route('/stats')
+def stats():
+    return jsonify(server_stats())
+
+def metrics_text():
+    """Prometheus exposition of the stage histograms, counters and pool/batcher metrics"""
+    families = [
+        ('handly_stage_duration_milliseconds', 'histogram', "Time spent in each /predict pipeline stage",
+         [({'stage': stage}, histogram) for stage, histogram in stage_timers.histograms.items()]),
+        ('handly_frames_total', 'counter', "Frames answered (HTTP and WebSocket)",
+         [({}, counters['frames'].value)]),
+        ('handly_frames_hand_detected_total', 'counter', "Frames answered with a hand in view",
+         [({}, counters['hand_detected'].value)]),
+        ('handly_responses_total', 'counter', "Responses by whether a prediction was ready",
+         [({'ready': 'true'}, counters['ready'].value), ({'ready': 'false'}, counters['not_ready'].value)]),
+        ('handly_request_errors_total', 'counter', "Rejected /predict requests",
+         [({}, counters['errors'].value)]),
+        ('handly_active_sessions', 'gauge', "Sessions holding a landmark buffer",
+         [({}, sessions.stats()['active'])]),
+        ('handly_websocket_connections_active', 'gauge', "Open WebSocket streams",
+         [({}, ws_counters['active'])]),
+        ('handly_hands_pool_wait_milliseconds', 'histogram', "Wait for a pooled MediaPipe Hands instance",
+         [({}, hands_pool.wait_ms)]),
+    ]
+    if batcher is not None:
+        families += [
+            ('handly_batch_size', 'histogram', "Windows per batched forward pass", [({}, batcher.batch_sizes)]),
+            ('handly_batch_queue_wait_milliseconds', 'histogram', "Time a window waited for its batch",
+             [({}, batcher.queue_wait_ms)]),
+            ('handly_batch_inference_milliseconds', 'histogram', "Batched forward pass time",
+             [({}, batcher.inference_ms)]),
+        ]
+    return render_prometheus(families)
+
+@app.route('/metrics')
+def metrics():
+    return Response(metrics_text(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     print(f"\nSigns: {signs}")
+    print(f"Inference backend: {backend.name} ({INFERENCE_MODE} mode)")
     print("Open http://localhost:8080 in Chrome\n")
     app.run(host='0.0.0.0', port=8080, debug=False, threaded=True)
@@ -0,0 +1,147 @@
+"""
+ASGI entry point for the recognition server
+Serves the same routes as app.py (/, /predict, /reset, /stats, /metrics) with async
+request I/O. CPU-heavy stages (JPEG decode, MediaPipe, buffering) run on a
+bounded thread pool, and batched inference is awaited on the batcher's
+future, so slow or idle connections don't each hold an OS thread.
+
+Run:  uvicorn asgi:app --host 0.0.0.0 --port 8080
+  or: python asgi.py
+"""
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+from starlette.templating import Jinja2Templates
+
+import app as core
+from metrics import request_timings
+
+CPU_WORKERS = int(os.environ.get('HANDLY_ASGI_CPU_WORKERS', os.cpu_count() or 1))
+INFERENCE_WORKERS = int(os.environ.get('HANDLY_ASGI_INFERENCE_WORKERS', 2))
+
+cpu_pool = ThreadPoolExecutor(CPU_WORKERS, thread_name_prefix='handly-cpu')
+inference_pool = ThreadPoolExecutor(INFERENCE_WORKERS, thread_name_prefix='handly-inference')
+templates = Jinja2Templates(directory='templates')
+
+
+def ingest(session_id, kind, value):
+    """CPU stage on cpu_pool: landmarks for the frame, then buffer them"""
+    if kind == 'frame':
+        frame = core.decode_image(value)
+        landmarks, hand_detected = core.extract_landmarks(frame, session_id)
+    else:
+        landmarks, hand_detected = core.parse_landmarks(value)
+    window, buffer_size, pred = core.buffer_frame(session_id, landmarks)
+    return window, buffer_size, pred, hand_detected
+
+
+async def read_payload(request):
+    """Same three input contracts as app.read_input(), read without blocking"""
+    if request.headers.get('content-type', '').split(';')[0].strip() == 'application/octet-stream':
+        session_id = core.check_session_id(request.query_params.get('session', 'default'))
+        return session_id, 'landmarks', np.frombuffer(await request.body(), dtype='<f4')
+
+    try:
+        data = await request.json()
+    except ValueError:
+        raise ValueError("invalid JSON body")
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    session_id = core.check_session_id(data.get('session', 'default'))
+    if 'landmarks' in data:
+        return session_id, 'landmarks', data['landmarks']
+    if 'frame' in data:
+        return session_id, 'frame', data['frame']
+    raise ValueError("request needs 'frame' or 'landmarks'")
+
+
+async def index(request):
+    return templates.TemplateResponse(request, 'index.html', {
+        'signs': core.signs,
+        'mode': request.query_params.get('mode', 'image'),
+        'transport': request.query_params.get('transport', 'http'),
+    })
+
+
+async def predict(request):
+    with request_timings() as timings:
+        start = time.perf_counter()
+        response = await handle_predict(request)
+        core.stage_timers.observe('total', (time.perf_counter() - start) * 1000)
+        if core.timing_requested(request.headers):
+            response.headers['Server-Timing'] = timings.header()
+    return response
+
+
+async def handle_predict(request):
+    loop = asyncio.get_running_loop()
+    try:
+        session_id, kind, value = await read_payload(request)
+        # Copy the context so stages timed on the pool land in this request's timings
+        window, buffer_size, pred, hand_detected = await loop.run_in_executor(
+            cpu_pool, contextvars.copy_context().run, ingest, session_id, kind, value)
+    except (ValueError, TypeError) as e:
+        core.counters['errors'].inc()
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    if window is not None:
+        if core.batcher is not None:
+            start = time.perf_counter()
+            pred = await asyncio.wrap_future(core.batcher.submit(window))
+            core.stage_timers.observe('inference', (time.perf_counter() - start) * 1000)
+        else:
+            pred = await loop.run_in_executor(inference_pool, contextvars.copy_context().run,
+                                              core.predict_window, window)
+    result = core.format_result(pred, hand_detected, buffer_size)
+    with core.stage_timers.time('serialize'):
+        return JSONResponse(result)
+
+
+async def reset(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    try:
+        session_id = core.check_session_id((data if isinstance(data, dict) else {}).get('session', 'default'))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    # Closing a session's tracker can wait on an in-flight frame
+    await asyncio.get_running_loop().run_in_executor(cpu_pool, core.reset_session, session_id)
+    return JSONResponse({'status': 'ok'})
+
+
+async def stats(request):
+    result = core.server_stats()
+    result['asgi'] = {'cpu_workers': CPU_WORKERS, 'inference_workers': INFERENCE_WORKERS}
+    return JSONResponse(result)
+
+
+async def metrics(request):
+    text = await asyncio.get_running_loop().run_in_executor(cpu_pool, core.metrics_text)
+    return PlainTextResponse(text, media_type='text/plain; version=0.0.4')
+
+
+app = Starlette(routes=[
+    Route('/', index),
+    Route('/predict', predict, methods=['POST']),
+    Route('/reset', reset, methods=['POST']),
+    Route('/stats', stats),
+    Route('/metrics', metrics),
+])
+
+
+if __name__ == '__main__':
+    import uvicorn
+    print(f"\nSigns: {core.signs}")
+    print(f"Inference backend: {core.backend.name} ({core.INFERENCE_MODE} mode), "
+          f"{CPU_WORKERS} CPU workers")
+    print("Open http://localhost:8080 in Chrome\n")
+    uvicorn.run(app, host='0.0.0.0', port=8080)
@@ -0,0 +1,96 @@
+"""
+Cross-session micro-batching for LSTM inference
+Request threads submit ready 30-frame windows; a single worker thread
+collects them until the batch is full or the oldest one has waited
+max_wait_ms, runs one forward pass and hands each caller its own row.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from metrics import Histogram
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+WAIT_MS_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+
+class InferenceBatcher:
+    """Background worker that batches windows from all sessions"""
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(WAIT_MS_BUCKETS)
+        self.inference_ms = Histogram(WAIT_MS_BUCKETS)
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, window):
+        """Queue one (T, F) window; returns a Future resolving to its class probabilities"""
+        future = Future()
+        self._queue.put((window, future, time.perf_counter()))
+        return future
+
+    def predict(self, window):
+        return self.submit(window).result()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # re-queue so the loop exits after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+
+            start = time.perf_counter()
+            for _, _, enqueued in batch:
+                self.queue_wait_ms.observe((start - enqueued) * 1000)
+            self.batch_sizes.observe(len(batch))
+
+            try:
+                X = np.stack([window for window, _, _ in batch])
+                probs = self.predict_fn(X)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            self.inference_ms.observe((time.perf_counter() - start) * 1000)
+
+            for row, (_, future, _) in zip(probs, batch):
+                future.set_result(row)
+
+    def stats(self):
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'queued': self._queue.qsize(),
+            'batch_size': self.batch_sizes.snapshot(),
+            'queue_wait_ms': self.queue_wait_ms.snapshot(),
+            'inference_ms': self.inference_ms.snapshot(),
+        }
@@ -0,0 +1,77 @@
+"""
+Parity and latency check for the inference backends in inference.py
+Compares every backend against Keras model.predict on random windows
+(including all-zero "no hand" frames) and times each at a few batch sizes.
+Exits non-zero if any backend disagrees with Keras beyond the tolerance.
+
+Usage: python benchmarks/bench_backends.py [models/sign_classifier.keras]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference import KerasBackend, TFFunctionBackend, TFLiteBackend, NumpyBackend, _load_keras
+
+TOLERANCE = 1e-4
+BATCH_SIZES = [1, 8, 32]
+REPEATS = 50
+
+
+def make_inputs(batch, steps, features, rng):
+    X = rng.random((batch, steps, features), dtype=np.float32)
+    X[:, ::4] = 0.0  # frames without a hand are zero-filled by the server
+    return X
+
+
+def time_call(fn, X):
+    fn(X)  # warm-up (tracing, tensor allocation)
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(X)
+        samples.append(time.perf_counter() - start)
+    return np.median(samples) * 1000
+
+
+def main():
+    model_path = sys.argv[1] if len(sys.argv) > 1 else 'models/sign_classifier.keras'
+    model = _load_keras(model_path)
+    _, steps, features = model.input_shape
+
+    backends = [
+        KerasBackend(model),
+        TFFunctionBackend(model),
+        TFLiteBackend.from_keras(model),
+        NumpyBackend.from_keras(model),
+    ]
+    rng = np.random.default_rng(0)
+
+    print("=" * 60)
+    print("PARITY vs keras (max |diff| of class probabilities)")
+    print("=" * 60)
+    failed = False
+    X = make_inputs(32, steps, features, rng)
+    reference = backends[0].predict(X)
+    for backend in backends[1:]:
+        diff = float(np.max(np.abs(backend.predict(X) - reference)))
+        ok = diff <= TOLERANCE
+        failed |= not ok
+        print(f"{'✓' if ok else '✗'} {backend.name:12s} {diff:.2e}")
+
+    print("\n" + "=" * 60)
+    print("LATENCY (median ms per call)")
+    print("=" * 60)
+    print(f"{'backend':12s}" + "".join(f"{'batch=' + str(b):>12s}" for b in BATCH_SIZES))
+    for backend in backends:
+        row = [time_call(backend.predict, make_inputs(b, steps, features, rng)) for b in BATCH_SIZES]
+        print(f"{backend.name:12s}" + "".join(f"{ms:12.3f}" for ms in row))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Allocation microbenchmark: per-frame landmark buffering before/after LandmarkRing
+"before" replays the original app.py path: landmarks.extend into a fresh
+63-element list (or [0.0] * 63 with no hand), deque(maxlen=30).append and
+np.array([list(buffer)]) for every inference.
+"after" writes the MediaPipe result in place into a reused row, copies it
+into the doubled float32 ring and hands the model the contiguous view.
+
+Reports time per frame and the bytes allocated on top of the live set
+while handling each frame (tracemalloc peak), with a stand-in MediaPipe
+result so only buffering is measured.
+
+Usage: python benchmarks/bench_buffers.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from landmarks import landmarks_into
+from sessions import LandmarkRing
+
+SEQUENCE_LENGTH = 30
+FRAMES = 2000
+
+
+class _Point:
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+
+class _Hand:
+    def __init__(self, rng):
+        self.landmark = [_Point(*rng.random(3)) for _ in range(21)]
+
+
+class _Results:
+    def __init__(self, hand):
+        self.multi_hand_landmarks = [hand] if hand is not None else None
+
+
+def make_results(rng):
+    # Every fifth frame has no hand, like a learner moving out of view
+    return [_Results(_Hand(rng) if i % 5 else None) for i in range(FRAMES)]
+
+
+class Before:
+    """Original path: Python lists in a deque, rebuilt into an array per inference"""
+
+    def __init__(self):
+        self.buffer = deque(maxlen=SEQUENCE_LENGTH)
+
+    def step(self, results):
+        if results.multi_hand_landmarks:
+            landmarks = []
+            for lm in results.multi_hand_landmarks[0].landmark:
+                landmarks.extend([lm.x, lm.y, lm.z])
+        else:
+            landmarks = [0.0] * 63
+        self.buffer.append(landmarks)
+        if len(self.buffer) == SEQUENCE_LENGTH:
+            return np.array([list(self.buffer)])
+
+
+class After:
+    """In-place row write, doubled float32 ring, contiguous view for the model"""
+
+    def __init__(self):
+        self.ring = LandmarkRing(SEQUENCE_LENGTH, 63)
+        self.row = np.zeros(63, dtype=np.float32)
+
+    def step(self, results):
+        landmarks_into(results, self.row)
+        self.ring.append(self.row)
+        if len(self.ring) == SEQUENCE_LENGTH:
+            return self.ring.window()[np.newaxis]
+
+
+def measure(cls, results_seq):
+    path = cls()
+    for results in results_seq[:100]:  # fill the buffer and warm up
+        path.step(results)
+
+    start = time.perf_counter()
+    for results in results_seq:
+        path.step(results)
+    per_frame_us = (time.perf_counter() - start) * 1e6 / len(results_seq)
+
+    # Bytes allocated on top of the live set while handling one frame
+    tracemalloc.start()
+    samples = []
+    for results in results_seq[:500]:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        X = path.step(results)
+        _, peak = tracemalloc.get_traced_memory()
+        samples.append(peak - current)
+        del X
+    tracemalloc.stop()
+    return per_frame_us, np.mean(samples), max(samples)
+
+
+def main():
+    results_seq = make_results(np.random.default_rng(0))
+    print("=" * 60)
+    print(f"{'path':10s}{'us/frame':>12s}{'mean bytes/frame':>19s}{'max bytes/frame':>18s}")
+    print("=" * 60)
+    for name, cls in (('before', Before), ('after', After)):
+        us, mean_bytes, max_bytes = measure(cls, results_seq)
+        print(f"{name:10s}{us:12.2f}{mean_bytes:19.0f}{max_bytes:18.0f}")
+
+
+if __name__ == '__main__':
+    main()
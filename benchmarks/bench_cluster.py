@@ -0,0 +1,87 @@
+"""
+Throughput vs worker count for cluster.py
+Starts the cluster with each worker count in turn, drives it with the
+load_test.py session simulator and reports throughput, latency percentiles
+and worker memory (RSS and PSS; PSS splits shared pages such as the
+memory-mapped weights between the processes that map them).
+
+Usage: python benchmarks/bench_cluster.py --workers 1 2 4 --sessions 100 --fps 10
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from load_test import run_load
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for(url, proc, timeout=300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"cluster exited with code {proc.returncode}")
+        try:
+            urllib.request.urlopen(url + '/stats', timeout=2).read()
+            return
+        except OSError:
+            time.sleep(1.0)
+    raise RuntimeError("cluster did not start")
+
+
+def worker_memory(cluster_pid):
+    """Total (rss, pss) in MB over the cluster's child processes"""
+    rss = pss = 0
+    children = open(f'/proc/{cluster_pid}/task/{cluster_pid}/children').read().split()
+    for pid in children:
+        try:
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Rss:'):
+                        rss += int(line.split()[1])
+                    elif line.startswith('Pss:'):
+                        pss += int(line.split()[1])
+        except OSError:
+            pass
+    return rss / 1024, pss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--fps', type=float, default=10)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--payload', choices=['landmarks', 'image'], default='landmarks')
+    parser.add_argument('--port', type=int, default=8090)
+    args = parser.parse_args()
+
+    url = f'http://127.0.0.1:{args.port}'
+    print("=" * 78)
+    print(f"CLUSTER SCALING  {args.sessions} sessions x {args.fps:g} fps  payload={args.payload}  "
+          f"({os.cpu_count()} cores)")
+    print("=" * 78)
+    print(f"{'workers':>8s}{'req/s':>10s}{'errors':>8s}{'p50 ms':>8s}{'p99 ms':>8s}"
+          f"{'RSS MB':>10s}{'PSS MB':>10s}")
+    for n in args.workers:
+        proc = subprocess.Popen([sys.executable, os.path.join(ROOT, 'cluster.py'), '--workers', str(n),
+                                 '--port', str(args.port)], stdout=subprocess.DEVNULL)
+        try:
+            wait_for(url, proc)
+            s = run_load(url, args.sessions, args.fps, args.duration, args.payload)
+            rss, pss = worker_memory(proc.pid)
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            proc.wait()
+        p50 = f"{s['p50_ms']:8.1f}" if s['p50_ms'] is not None else "       -"
+        p99 = f"{s['p99_ms']:8.1f}" if s['p99_ms'] is not None else "       -"
+        print(f"{n:8d}{s['throughput']:10.1f}{s['errors']:8d}{p50}{p99}{rss:10.0f}{pss:10.0f}")
+
+
+if __name__ == '__main__':
+    main()
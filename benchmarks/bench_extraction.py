@@ -0,0 +1,108 @@
+"""
+Offline extraction options: speed and test-split accuracy
+Extracts every training video with each option set, reports wall time and
+speedup over the full-rate, full-resolution baseline, then trains the
+setup.py model on each variant and reports test accuracy. Training uses
+setup.py's feature spec (--features / --float16) and its content-hash
+train/test split, so every variant is scored on the same held-out videos
+the real pipeline would hold out.
+
+Usage: python benchmarks/bench_extraction.py [--epochs 50] [--no-train] [--features raw]
+       (videos from data/<sign>/*.mp4 for the signs in setup.py)
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset_store import TEST, assign_split
+from extraction import MIN_FRAMES, create_hands, extract_video
+from feature_cache import file_sha256
+from features import compute_features, feature_dim
+from setup import DATA_DIR, SEQUENCE_LENGTH, SIGNS, add_feature_args, build_model, feature_spec
+
+CONFIGS = [
+    ('baseline', {}),
+    ('early exit', {'max_frames': SEQUENCE_LENGTH}),
+    ('max side 320', {'max_side': 320, 'max_frames': SEQUENCE_LENGTH}),
+    ('stride 2', {'stride': 2, 'max_frames': SEQUENCE_LENGTH}),
+    ('10 fps, 320', {'target_fps': 10, 'max_side': 320, 'max_frames': SEQUENCE_LENGTH}),
+]
+
+
+def pad_sequence(seq, dim):
+    """First SEQUENCE_LENGTH frames, zero-padded; an empty sequence gives all zeros"""
+    out = np.zeros((SEQUENCE_LENGTH, dim), dtype=np.float32)
+    seq = seq[:SEQUENCE_LENGTH]
+    if len(seq):
+        out[:len(seq)] = seq
+    return out
+
+
+def extract(videos, options):
+    hands = create_hands()
+    start = time.perf_counter()
+    seqs = [extract_video(path, hands, **options) for path, _ in videos]
+    elapsed = time.perf_counter() - start
+    hands.close()
+    return seqs, elapsed
+
+
+def test_accuracy(seqs, labels, is_test, spec, epochs):
+    from tensorflow import keras
+    # Same filter and features as setup.py; clips with too few hand frames never reach the model
+    keep = np.array([len(s) >= MIN_FRAMES for s in seqs], dtype=bool)
+    train = np.flatnonzero(keep & ~is_test)
+    test = np.flatnonzero(keep & is_test)
+    if not len(train) or not len(test):
+        return None
+    dim = feature_dim(spec)
+    X = np.zeros((len(seqs), SEQUENCE_LENGTH, dim), dtype=np.float32)
+    for i in np.flatnonzero(keep):
+        X[i] = pad_sequence(compute_features(seqs[i], spec), dim)
+    keras.utils.set_random_seed(0)
+    model = build_model(dim)
+    model.fit(X[train], labels[train], epochs=epochs, batch_size=8, verbose=0)
+    return model.evaluate(X[test], labels[test], verbose=0)[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--epochs', type=int, default=50)
+    parser.add_argument('--no-train', action='store_true', help="only report extraction speed")
+    add_feature_args(parser)
+    args = parser.parse_args()
+    spec = feature_spec(args)
+
+    videos = [(path, idx) for idx, sign in enumerate(SIGNS)
+              for path in sorted(glob.glob(os.path.join(DATA_DIR, sign, '*.mp4')))]
+    if not videos:
+        sys.exit(f"No videos under {DATA_DIR}/<sign>/ - run setup.py first")
+    labels = np.array([idx for _, idx in videos])
+
+    # setup.py's split by video content hash, the same for every variant
+    is_test = np.array([assign_split(file_sha256(path)) == TEST for path, _ in videos])
+
+    print("=" * 72)
+    print(f"EXTRACTION OPTIONS  {len(videos)} videos, {int(is_test.sum())} in the test split")
+    print("=" * 72)
+    print(f"{'config':<14s}{'time s':>9s}{'speedup':>9s}{'frames/vid':>12s}{'kept':>6s}{'test acc':>10s}")
+    baseline = None
+    for name, options in CONFIGS:
+        seqs, elapsed = extract(videos, options)
+        baseline = baseline or elapsed
+        kept = sum(len(s) >= MIN_FRAMES for s in seqs)
+        acc = "-"
+        if not args.no_train:
+            score = test_accuracy(seqs, labels, is_test, spec, args.epochs)
+            acc = f"{score:.3f}" if score is not None else "-"
+        print(f"{name:<14s}{elapsed:9.1f}{baseline / elapsed:8.1f}x{np.mean([len(s) for s in seqs]):12.1f}"
+              f"{kept:6d}{acc:>10s}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Per-frame cost of GestureRecognizer predictions at different batch sizes
+Fits the same RandomForest/StandardScaler configuration as train_model()
+on synthetic 63-value landmark rows, then times the old per-frame path
+(scaler.transform + predict + predict_proba on one row) against
+predict_batch() at batch sizes 1, 32 and 1024, both on scikit-learn and on
+the flattened forest, and checks the labels and confidences agree.
+
+Usage: python benchmarks/bench_gesture_batch.py [--samples 90] [--repeats 20]
+"""
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models'))
+from gesture_recognizer import GestureRecognizer
+
+BATCH_SIZES = [1, 32, 1024]
+
+
+def synthetic_landmarks(n, classes, rng):
+    """Three clusters of 21 (x, y, z) landmarks with per-frame jitter"""
+    centers = rng.random((classes, 63), dtype=np.float32)
+    y = rng.integers(0, classes, n)
+    X = centers[y] + rng.normal(0, 0.05, (n, 63)).astype(np.float32)
+    return X, y
+
+
+def build_recognizer(root, samples, rng):
+    X, y = synthetic_landmarks(samples, 3, rng)
+    scaler = StandardScaler()
+    # Same configuration as GestureRecognizer.train_model()
+    model = RandomForestClassifier(n_estimators=100, max_depth=15, min_samples_split=5, min_samples_leaf=2,
+                                   random_state=42, n_jobs=-1)
+    model.fit(scaler.fit_transform(X), y)
+    model_path, scaler_path = os.path.join(root, 'gesture_model.pkl'), os.path.join(root, 'scaler.pkl')
+    with open(model_path, 'wb') as f:
+        pickle.dump(model, f)
+    with open(scaler_path, 'wb') as f:
+        pickle.dump(scaler, f)
+    return GestureRecognizer(model_path, scaler_path)
+
+
+def old_predict(recognizer, landmarks):
+    """predict_gesture before predict_batch: the forest runs twice per frame"""
+    scaled = recognizer.scaler.transform([landmarks])
+    return recognizer.model.predict(scaled)[0], np.max(recognizer.model.predict_proba(scaled))
+
+
+def per_frame_ms(fn, frames, repeats):
+    fn(frames)  # warm-up
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(frames)
+        samples.append(time.perf_counter() - start)
+    return np.median(samples) * 1000 / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=90, help="training rows (train_model collects 30 per gesture)")
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as root:
+        recognizer = build_recognizer(root, args.samples, rng)  # exports and loads the flattened forest
+    frames, _ = synthetic_landmarks(max(BATCH_SIZES), 3, rng)
+
+    old = [old_predict(recognizer, row) for row in frames]
+    labels, confidences = recognizer.predict_batch(frames)
+    same = (np.array_equal([label for label, _ in old], labels)
+            and np.allclose([conf for _, conf in old], confidences))
+
+    print("=" * 56)
+    print(f"GESTURE PREDICTION  {os.cpu_count()} cores, parity with old path: {'OK' if same else 'MISMATCH'}")
+    print("=" * 56)
+    print(f"{'path':<28s}{'batch':>8s}{'ms/frame':>12s}{'speedup':>8s}")
+    baseline = per_frame_ms(lambda X: [old_predict(recognizer, row) for row in X], frames[:32], args.repeats)
+    print(f"{'predict + predict_proba':<28s}{1:8d}{baseline:12.3f}{1.0:8.1f}")
+    forest = recognizer.forest
+    for label, path_forest in (('predict_batch (sklearn)', None), ('predict_batch (flat)', forest)):
+        recognizer.forest = path_forest
+        for batch in BATCH_SIZES:
+            ms = per_frame_ms(recognizer.predict_batch, frames[:batch], args.repeats)
+            print(f"{label:<28s}{batch:8d}{ms:12.3f}{baseline / ms:8.1f}")
+    recognizer.forest = forest
+    sys.exit(0 if same else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+tf.data input pipeline throughput and memory
+Builds a synthetic DatasetStore of ragged sequences in a temp directory,
+then iterates one training epoch of training.make_dataset() with different
+tf.data thread counts, with and without the in-memory cache, reporting
+sequences/s and anonymous RSS growth. The padded in-memory arrays the old STEP 4 built
+are listed for comparison.
+
+Usage: python benchmarks/bench_input_pipeline.py [--sequences 20000] [--epochs 2]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import tensorflow as tf
+from dataset_store import DatasetStore, assign_split
+from training import make_dataset
+
+
+def anon_rss_mb():
+    """Anonymous resident memory; pages of the mapped store are file-backed and reclaimable"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('RssAnon:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def build_store(root, n, classes=100, seed=0):
+    rng = np.random.default_rng(seed)
+    store = DatasetStore(root, dim=63, classes=[f'sign{i}' for i in range(classes)])
+    items = ((f'{i:016x}', rng.random((rng.integers(20, 120), 63), dtype=np.float32), i % classes,
+              assign_split(f'{(i * 2654435761) % 2**32:08x}')) for i in range(n))
+    store.append_many(items)
+    return store
+
+
+def run_epochs(store, threads, cache_bytes, epochs, batch_size):
+    ds = make_dataset(store, np.arange(len(store)), batch_size=batch_size, training=True, cache_bytes=cache_bytes)
+    options = tf.data.Options()
+    options.threading.private_threadpool_size = threads
+    ds = ds.with_options(options)
+    before = anon_rss_mb()
+    times = []
+    for _ in range(epochs):
+        start = time.perf_counter()
+        for _ in ds:
+            pass
+        times.append(time.perf_counter() - start)
+    return len(store) / min(times), anon_rss_mb() - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sequences', type=int, default=20000)
+    parser.add_argument('--epochs', type=int, default=2)
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = build_store(root, args.sequences)
+        frames = int(store.lengths().sum())
+        print("=" * 62)
+        print(f"INPUT PIPELINE  {len(store)} sequences, {frames} frames "
+              f"({frames * 63 * 4 / 1e6:.0f} MB mapped), {os.cpu_count()} cores")
+        print(f"old padded arrays: {len(store) * 30 * 63 * 8 / 1e6:.0f} MB float64 held for all of training")
+        print("=" * 62)
+        print(f"{'threads':>8s}{'cache':>8s}{'seq/s':>12s}{'anon +MB':>10s}")
+        thread_counts = sorted({1, os.cpu_count() or 1})
+        for cache_bytes, label in ((0, 'off'), (2**40, 'on')):
+            for threads in thread_counts:
+                throughput, grown = run_epochs(store, threads, cache_bytes, args.epochs, args.batch_size)
+                print(f"{threads:8d}{label:>8s}{throughput:12.0f}{grown:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+CPU per frame of the adaptive live recognizer: ROI cropping + motion skip
+Decodes each clip once, then runs every frame through GestureRecognizer's
+extract_hand_landmarks() + classify() in several modes and reports CPU
+ms/frame (process time), hand-detection rate, mean landmark error and
+label agreement against the full-frame mode, and how often the last
+prediction was reused.
+
+Without --model, a RandomForest is fitted on the full-frame landmarks
+(one class per clip) so the label comparison has something to classify.
+
+Usage: python benchmarks/bench_roi.py [video.mp4 ...] [--model gesture_model.pkl --scaler scaler.pkl]
+       (defaults to demo_videos/*.mp4, then data/*/*.mp4)
+"""
+import argparse
+import glob
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models'))
+from gesture_recognizer import GestureRecognizer
+
+# (label, adaptive, motion_threshold)
+MODES = [
+    ('full frame', False, None),
+    ('roi', True, 0.0),
+    ('roi + skip 0.01', True, 0.01),
+    ('roi + skip 0.02', True, 0.02),
+]
+
+
+def read_frames(path, max_side=640):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        scale = max_side / max(frame.shape[:2])
+        if scale < 1:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run(recognizer, clips):
+    """Per-frame landmarks (None when no hand) and labels over all clips, plus CPU seconds"""
+    landmarks, labels = [], []
+    cpu = 0.0
+    for frames in clips:
+        recognizer.hands.reset()  # each clip is a new stream
+        if recognizer.roi is not None:
+            recognizer.roi.reset()
+        recognizer.classify(None)
+        for frame in frames:
+            start = time.process_time()
+            row, hand_detected, _ = recognizer.extract_hand_landmarks(frame)
+            prediction, _ = recognizer.classify(row if hand_detected else None)
+            cpu += time.process_time() - start
+            landmarks.append(row if hand_detected else None)
+            labels.append(prediction)
+    return landmarks, labels, cpu
+
+
+def fit_clip_model(root, landmarks, clip_ids):
+    rows = [(row, clip) for row, clip in zip(landmarks, clip_ids) if row is not None]
+    X = np.array([row for row, _ in rows])
+    y = np.array([clip for _, clip in rows])
+    scaler = StandardScaler()
+    model = RandomForestClassifier(n_estimators=100, max_depth=15, min_samples_split=5, min_samples_leaf=2,
+                                   random_state=42)
+    model.fit(scaler.fit_transform(X), y)
+    paths = os.path.join(root, 'gesture_model.pkl'), os.path.join(root, 'scaler.pkl')
+    for obj, path in zip((model, scaler), paths):
+        with open(path, 'wb') as f:
+            pickle.dump(obj, f)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('videos', nargs='*')
+    parser.add_argument('--model')
+    parser.add_argument('--scaler')
+    args = parser.parse_args()
+
+    paths = args.videos or sorted(glob.glob('demo_videos/*.mp4')) or sorted(glob.glob('data/*/*.mp4'))
+    if not paths:
+        print("No videos found; pass paths or add demo_videos/*.mp4")
+        sys.exit(1)
+    clips = [read_frames(path) for path in paths]
+    clip_ids = [i for i, frames in enumerate(clips) for _ in frames]
+    n_frames = len(clip_ids)
+
+    with tempfile.TemporaryDirectory() as root:
+        if args.model and args.scaler:
+            model_path, scaler_path = args.model, args.scaler
+        else:
+            baseline, _, _ = run(GestureRecognizer(os.path.join(root, 'none.pkl'), os.path.join(root, 'none.pkl')), clips)
+            if not any(row is not None for row in baseline):
+                print("No hands detected in any clip; nothing to compare")
+                sys.exit(1)
+            model_path, scaler_path = fit_clip_model(root, baseline, clip_ids)
+
+        results = []
+        for label, adaptive, threshold in MODES:
+            recognizer = GestureRecognizer(model_path, scaler_path, adaptive=adaptive,
+                                           motion_threshold=threshold if adaptive else 0.01)
+            landmarks, labels, cpu = run(recognizer, clips)
+            reused = recognizer.reused / max(recognizer.reused + recognizer.classified, 1)
+            results.append((label, landmarks, labels, cpu, reused, recognizer.roi))
+
+    _, ref_landmarks, ref_labels, ref_cpu, _, _ = results[0]
+    print("=" * 86)
+    print(f"ADAPTIVE RECOGNIZER  {len(paths)} clips, {n_frames} frames, {os.cpu_count()} cores")
+    print("=" * 86)
+    print(f"{'mode':<18s}{'cpu ms/frame':>13s}{'speedup':>9s}{'detected':>10s}{'lm error':>10s}"
+          f"{'labels =':>10s}{'reused':>8s}{'cropped':>9s}")
+    for label, landmarks, labels, cpu, reused, roi in results:
+        both = [(a, b) for a, b in zip(landmarks, ref_landmarks) if a is not None and b is not None]
+        error = np.mean([np.abs(a - b).mean() for a, b in both]) if both else float('nan')
+        agree = np.mean([a == b for a, b in zip(labels, ref_labels)])
+        detected = np.mean([row is not None for row in landmarks])
+        cropped = roi.cropped / max(roi.cropped + roi.full, 1) if roi is not None else 0.0
+        print(f"{label:<18s}{cpu / n_frames * 1000:13.2f}{ref_cpu / cpu:9.2f}{detected:10.1%}{error:10.4f}"
+              f"{agree:10.1%}{reused:8.1%}{cropped:9.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Equivalence and cost check for StreamingLSTM vs the windowed model
+Feeds a synthetic landmark stream (with zero-filled "no hand" gaps) one
+frame at a time and, at every frame, compares the streaming prediction
+with re-running the last 30 frames through NumpyBackend.predict.
+
+stride=1 must match the windowed output (max |diff| <= 1e-4, exit code 1
+otherwise). Larger strides only refresh every `stride` frames, so for them
+the report shows how often the served label differs from the windowed one.
+
+Usage: python benchmarks/bench_streaming.py [models/sign_classifier.keras]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference import load_backend, StreamingLSTM
+
+WINDOW = 30
+FRAMES = 300
+STRIDES = [1, 2, 3, 5, 10]
+TOLERANCE = 1e-4
+
+
+def make_stream(frames, features, rng):
+    # Smooth random walk, roughly like a moving hand, with dropouts
+    X = np.cumsum(rng.normal(0, 0.02, (frames, features)), axis=0).astype(np.float32) + 0.5
+    gaps = rng.random(frames) < 0.1
+    X[gaps] = 0.0
+    return X
+
+
+def main():
+    model_path = sys.argv[1] if len(sys.argv) > 1 else 'models/sign_classifier.keras'
+    backend = load_backend('numpy', model_path)
+    features = backend.layers[0]['kernel'].shape[0]
+    stream = make_stream(FRAMES, features, np.random.default_rng(0))
+
+    # Windowed reference: one full forward pass per frame once the window is full
+    start = time.perf_counter()
+    windowed = {}
+    for t in range(WINDOW - 1, FRAMES):
+        windowed[t] = backend.predict(stream[None, t - WINDOW + 1:t + 1])[0]
+    windowed_ms = (time.perf_counter() - start) * 1000 / len(windowed)
+
+    print("=" * 60)
+    print(f"STREAMING vs WINDOWED ({FRAMES} frames, window={WINDOW})")
+    print("=" * 60)
+    print(f"windowed        {windowed_ms:8.3f} ms/frame")
+    failed = False
+    for stride in STRIDES:
+        streamer = StreamingLSTM(backend, window=WINDOW, stride=stride)
+        state = streamer.new_state()
+        max_diff, mismatches, served = 0.0, 0, 0
+
+        start = time.perf_counter()
+        outputs = []
+        for t in range(FRAMES):
+            streamer.step(state, stream[t])
+            outputs.append(state.last)
+        stream_ms = (time.perf_counter() - start) * 1000 / FRAMES
+
+        for t, ref in windowed.items():
+            out = outputs[t]
+            if out is None:
+                continue
+            served += 1
+            if stride == 1:
+                max_diff = max(max_diff, float(np.max(np.abs(out - ref))))
+            mismatches += int(np.argmax(out) != np.argmax(ref))
+
+        line = f"stride={stride:<3d}      {stream_ms:8.3f} ms/frame  label mismatch {mismatches}/{served}"
+        if stride == 1:
+            ok = max_diff <= TOLERANCE and served == len(windowed)
+            failed |= not ok
+            line += f"  max|diff| {max_diff:.2e} {'✓' if ok else '✗'}"
+        print(line)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
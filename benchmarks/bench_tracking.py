@@ -0,0 +1,85 @@
+"""
+Per-frame MediaPipe Hands cost: static_image_mode=True vs tracking mode
+Decodes each clip once, then runs every frame through a fresh Hands
+instance in both modes and reports ms/frame, hand-detection rate and the
+mean landmark difference between the two modes on frames both detected.
+
+Usage: python benchmarks/bench_tracking.py [video.mp4 ...]
+       (defaults to demo_videos/*.mp4, then data/*/*.mp4)
+"""
+import glob
+import os
+import sys
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+
+def read_frames(path):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames
+
+
+def run(frames, static):
+    hands = mp.solutions.hands.Hands(static_image_mode=static, max_num_hands=1,
+                                     min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    out = []
+    start = time.perf_counter()
+    for rgb in frames:
+        results = hands.process(rgb)
+        if results.multi_hand_landmarks:
+            lm = results.multi_hand_landmarks[0].landmark
+            out.append(np.array([[p.x, p.y, p.z] for p in lm], dtype=np.float32))
+        else:
+            out.append(None)
+    elapsed = time.perf_counter() - start
+    hands.close()
+    return out, elapsed
+
+
+def main():
+    videos = sys.argv[1:] or sorted(glob.glob('demo_videos/*.mp4')) or sorted(glob.glob('data/*/*.mp4'))
+    if not videos:
+        print("No videos found; pass paths or populate demo_videos/")
+        sys.exit(1)
+
+    print("=" * 72)
+    print(f"{'video':28s}{'frames':>8s}{'static ms':>11s}{'track ms':>10s}{'speedup':>9s}{'detect s/t':>12s}{'Δlm':>8s}")
+    print("=" * 72)
+    totals = {True: 0.0, False: 0.0}
+    total_frames = 0
+    for path in videos:
+        frames = read_frames(path)
+        if not frames:
+            continue
+        static, t_static = run(frames, True)
+        tracked, t_track = run(frames, False)
+        totals[True] += t_static
+        totals[False] += t_track
+        total_frames += len(frames)
+
+        both = [np.abs(a - b).mean() for a, b in zip(static, tracked) if a is not None and b is not None]
+        det_s = sum(a is not None for a in static) / len(frames)
+        det_t = sum(b is not None for b in tracked) / len(frames)
+        delta = f"{np.mean(both):.4f}" if both else "-"
+        print(f"{os.path.basename(path)[:27]:28s}{len(frames):8d}"
+              f"{t_static * 1000 / len(frames):11.2f}{t_track * 1000 / len(frames):10.2f}"
+              f"{t_static / t_track:8.2f}x{det_s:6.0%}/{det_t:<5.0%}{delta:>8s}")
+
+    if total_frames:
+        print("-" * 72)
+        print(f"{'TOTAL':28s}{total_frames:8d}{totals[True] * 1000 / total_frames:11.2f}"
+              f"{totals[False] * 1000 / total_frames:10.2f}{totals[True] / totals[False]:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
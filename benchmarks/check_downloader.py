@@ -0,0 +1,140 @@
+"""
+Self-check for downloader.py against a local stand-in HTTP server
+Serves a few misbehaving endpoints on 127.0.0.1 and checks retries, dead
+links, Range resume after a dropped connection, the manifest skipping
+known-dead URLs without a request, per-group limits and the per-host rate
+limit. Exits 1 if any check fails.
+
+Usage: python benchmarks/check_downloader.py
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from downloader import Downloader
+
+BODY = bytes(range(256)) * 200  # 51200 bytes
+
+
+class StandIn(BaseHTTPRequestHandler):
+    hits = defaultdict(int)
+    ranges = []
+    starts = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, body, status=200, headers=()):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        with self.lock:
+            self.hits[self.path] += 1
+            hit = self.hits[self.path]
+            self.starts.append(time.monotonic())
+            if self.headers.get('Range'):
+                self.ranges.append((self.path, self.headers['Range']))
+        if self.path.startswith('/video/'):
+            self.serve_range()
+        elif self.path == '/flaky':
+            if hit <= 2:
+                self.send_body(b'busy', 503, [('Retry-After', '0')])
+            else:
+                self.send_body(BODY)
+        elif self.path == '/gone':
+            self.send_body(b'not found', 404)
+        elif self.path == '/tiny':
+            self.send_body(b'<html>error</html>')
+        elif self.path == '/drop':
+            if hit == 1:
+                # Promise the whole body, send half, hang up
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(BODY)))
+                self.end_headers()
+                self.wfile.write(BODY[:len(BODY) // 2])
+                self.wfile.flush()
+                self.close_connection = True
+            else:
+                self.serve_range()
+        else:
+            self.send_body(b'?', 400)
+
+    def serve_range(self):
+        spec = self.headers.get('Range')
+        if spec:
+            start = int(spec.split('=')[1].split('-')[0])
+            self.send_body(BODY[start:], 206, [('Content-Range', f'bytes {start}-{len(BODY) - 1}/{len(BODY)}')])
+        else:
+            self.send_body(BODY)
+
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    failures = []
+
+    def check(name, ok):
+        print(f"{'PASS' if ok else 'FAIL'}  {name}")
+        if not ok:
+            failures.append(name)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = os.path.join(tmp, 'manifest.json')
+
+        def downloader(**kw):
+            kw.setdefault('per_host_rate', 1000)
+            return Downloader(manifest, workers=4, retries=3, backoff=0.01, timeout=5, verbose=False, **kw)
+
+        def out(name):
+            return os.path.join(tmp, 'out', name)
+
+        dl = downloader()
+        status = dict((u, dl.fetch(base + u, out(u.strip('/').replace('/', '_') + '.mp4'))[0])
+                      for u in ['/video/1', '/flaky', '/gone', '/tiny', '/drop'])
+        dl.manifest.save()
+        check("plain download", status['/video/1'] == 'ok' and open(out('video_1.mp4'), 'rb').read() == BODY)
+        check("503 retried until ok", status['/flaky'] == 'ok' and StandIn.hits['/flaky'] == 3)
+        check("404 is dead, not retried", status['/gone'] == 'dead' and StandIn.hits['/gone'] == 1)
+        check("error page is dead", status['/tiny'] == 'dead' and not os.path.exists(out('tiny.mp4')))
+        check("dropped connection resumed with Range",
+              status['/drop'] == 'ok' and ('/drop', f'bytes={len(BODY) // 2}-') in StandIn.ranges
+              and open(out('drop.mp4'), 'rb').read() == BODY)
+        check("no .part files left", not any(f.endswith('.part') for f in os.listdir(out(''))))
+
+        before = dict(StandIn.hits)
+        dl = downloader()
+        rerun = [dl.fetch(base + '/gone', out('gone.mp4'))[0], dl.fetch(base + '/video/1', out('video_1.mp4'))[0]]
+        check("rerun skips dead and existing without requests", rerun == ['dead', 'exists'] and dict(StandIn.hits) == before)
+        check("retry_dead re-requests", downloader(retry_dead=True).fetch(base + '/gone', out('gone.mp4'))[0] == 'dead'
+              and StandIn.hits['/gone'] == 2)
+
+        jobs = [(base + f'/video/g{i}', out(f'g{i}.mp4')) for i in range(6)]
+        results = downloader().run({'sign': [(base + '/gone', out('gone.mp4'))] + jobs}, need={'sign': 2})
+        fetched = [s for _, _, s in results['sign'] if s == 'ok']
+        check("group stops at its quota", len(fetched) == 2 and results['sign'][0][2] == 'dead')
+
+        StandIn.starts.clear()
+        limited = downloader(per_host_rate=5)
+        limited.run({'rate': [(base + f'/video/r{i}', out(f'r{i}.mp4')) for i in range(6)]})
+        span = max(StandIn.starts) - min(StandIn.starts)
+        check(f"per-host rate limit (6 requests at 5/s took {span:.2f}s)", span >= 0.95)
+
+    server.shutdown()
+    print(f"\n{len(failures)} failed" if failures else "\nAll checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Self-check and timing for features.py
+Checks that normalized features ignore hand position and scale, that
+no-hand frames stay zero, that every input shape gives the same per-frame
+features, that angles/distances match a straightforward per-landmark
+reference, and the float16 rounding error. Then times a 30-frame window
+and a large batch against that per-landmark loop. Exits 1 if a check fails.
+
+Usage: python benchmarks/check_features.py
+"""
+import itertools
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from features import FINGERS, FINGERTIPS, MIDDLE_MCP, RAW_SPEC, compute_features, feature_dim, make_spec
+
+
+def random_hands(shape, rng):
+    """Plausible-ish hands: a wrist somewhere in the frame plus offsets"""
+    wrist = rng.uniform(0.2, 0.8, (*shape, 1, 3)) * [1, 1, 0]
+    return (wrist + rng.normal(0, 0.08, (*shape, 21, 3))).astype(np.float32)
+
+
+def reference(frame):
+    """One frame, one landmark at a time: what the module replaces"""
+    pts = [tuple(frame[i * 3:i * 3 + 3]) for i in range(21)]
+    if not any(any(p) for p in pts):
+        return [0.0] * 88
+    wx, wy, wz = pts[0]
+    pts = [(x - wx, y - wy, z - wz) for x, y, z in pts]
+    scale = max(math.sqrt(sum(c * c for c in pts[MIDDLE_MCP])), 1e-6)
+    pts = [(x / scale, y / scale, z / scale) for x, y, z in pts]
+    out = [c for p in pts for c in p]
+    for chain in FINGERS:
+        bones = []
+        for a, b in zip(chain, chain[1:]):
+            v = [pts[b][k] - pts[a][k] for k in range(3)]
+            n = max(math.sqrt(sum(c * c for c in v)), 1e-6)
+            bones.append([c / n for c in v])
+        for u, v in zip(bones, bones[1:]):
+            out.append(math.acos(max(-1.0, min(1.0, sum(p * q for p, q in zip(u, v))))))
+    for a, b in itertools.combinations(FINGERTIPS, 2):
+        out.append(math.dist(pts[a], pts[b]))
+    return out
+
+
+def per_ms(fn, repeats=20):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    spec = make_spec()
+    failures = []
+
+    def check(name, ok):
+        print(f"{'PASS' if ok else 'FAIL'}  {name}")
+        if not ok:
+            failures.append(name)
+
+    window = random_hands((30,), rng)
+    window[5] = 0.0  # a frame without a hand
+    features = compute_features(window, spec)
+    moved = window * 1.7 + np.float32([0.1, -0.05, 0.02])
+    moved[5] = 0.0
+    check(f"shape (30, {feature_dim(spec)})", features.shape == (30, feature_dim(spec)))
+    check("translation/scale invariant", np.allclose(compute_features(moved, spec), features, atol=1e-4))
+    check("no-hand frame stays zero", not features[5].any() and features[4].any())
+    check("(T, 63), (T, 21, 3) and single frames agree",
+          np.allclose(compute_features(window.reshape(30, 63), spec), features)
+          and np.allclose(np.stack([compute_features(f.reshape(63), spec) for f in window]), features))
+    batch = random_hands((8, 30), rng)
+    check("batch of windows agrees per window",
+          np.allclose(compute_features(batch, spec)[3], compute_features(batch[3], spec)))
+    check("matches per-landmark reference",
+          np.allclose(features, np.array([reference(f) for f in window.reshape(30, 63)]), atol=1e-4))
+    check("raw spec is the landmarks", np.array_equal(compute_features(window, RAW_SPEC), window.reshape(30, 63)))
+    half = compute_features(window, make_spec(float16=True))
+    error = float(np.max(np.abs(half.astype(np.float32) - features)))
+    check(f"float16 max error {error:.1e}", half.dtype == np.float16 and error < 5e-3)
+
+    large = random_hands((256, 30), rng).reshape(-1, 63)
+    print("\n" + "=" * 52)
+    print(f"{'input':<24s}{'vectorized ms':>14s}{'per-landmark ms':>16s}")
+    print("=" * 52)
+    for label, X in (("1 frame", window[0].reshape(63)), ("30-frame window", window.reshape(30, 63)),
+                     (f"{len(large)} frames", large)):
+        rows = X.reshape(-1, 63)
+        fast = per_ms(lambda: compute_features(X, spec))
+        slow = per_ms(lambda: [reference(f) for f in rows], repeats=1 if len(rows) > 100 else 20)
+        print(f"{label:<24s}{fast:14.3f}{slow:16.3f}")
+
+    print(f"\n{len(failures)} failed" if failures else "\nAll checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Parity check for models/flat_forest.py against scikit-learn
+Fits StandardScaler + RandomForestClassifier pairs (the train_model()
+configuration plus unlimited depth, string labels and unbalanced classes),
+round-trips each through FlatForest.save/load and compares predict_proba
+and argmax labels with scikit-learn on held-out rows, including rows far
+outside the training range. Exits 1 if any case disagrees.
+
+Usage: python benchmarks/check_flat_forest.py
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models'))
+from flat_forest import FlatForest
+
+TOLERANCE = 1e-12
+TRAIN_MODEL_PARAMS = dict(n_estimators=100, max_depth=15, min_samples_split=5, min_samples_leaf=2, random_state=42)
+
+CASES = [
+    ("train_model config, 3 gestures", TRAIN_MODEL_PARAMS, [0, 1, 2], 90),
+    ("unlimited depth", dict(n_estimators=50, random_state=1), [0, 1, 2], 600),
+    ("string labels", TRAIN_MODEL_PARAMS, ['Hello', 'I Love You', 'Thank You', 'Yes', 'No'], 300),
+    ("unbalanced, 1 tree", dict(n_estimators=1, random_state=2), [3, 7], 200),
+]
+
+
+def landmarks(n, labels, rng):
+    centers = rng.random((len(labels), 63), dtype=np.float32)
+    which = rng.choice(len(labels), n, p=np.linspace(1, 3, len(labels)) / np.linspace(1, 3, len(labels)).sum())
+    X = centers[which] + rng.normal(0, 0.6, (n, 63)).astype(np.float32)
+    return X, np.asarray(labels)[which]
+
+
+def main():
+    rng = np.random.default_rng(0)
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, params, labels, samples in CASES:
+            X, y = landmarks(samples, labels, rng)
+            scaler = StandardScaler()
+            model = RandomForestClassifier(**params).fit(scaler.fit_transform(X), y)
+            path = os.path.join(tmp, 'forest.npz')
+            FlatForest.from_sklearn(model, scaler).save(path)
+            forest = FlatForest.load(path)
+
+            X_test = np.concatenate([landmarks(500, labels, rng)[0], rng.normal(0, 5, (50, 63)).astype(np.float32)])
+            expected = model.predict_proba(scaler.transform(X_test))
+            got = forest.predict_proba(X_test)
+            diff = float(np.max(np.abs(got - expected)))
+            flat_labels, confidences = forest.predict(X_test)
+            ok = (diff <= TOLERANCE and np.array_equal(flat_labels, model.predict(scaler.transform(X_test)))
+                  and np.allclose(confidences, expected.max(axis=1)))
+            print(f"{'PASS' if ok else 'FAIL'}  {name}: max |diff| {diff:.1e}, "
+                  f"{forest.left.size} nodes, depth {forest.depth}")
+            if not ok:
+                failures.append(name)
+
+    print(f"\n{len(failures)} failed" if failures else "\nAll checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
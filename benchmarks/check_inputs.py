@@ -0,0 +1,94 @@
+"""
+Self-check for the /predict input contracts on app.py and asgi.py
+Posts well-formed landmark, binary and frame payloads and a set of
+malformed ones to both front ends (Flask test client and Starlette
+TestClient) and checks that every malformed body gets a 400 with an
+"error" message rather than a 500. Also feeds the malformed frames to
+the WebSocket decoder, which must raise ValueError so /ws answers with an
+error and keeps the connection. Exits 1 if a check fails.
+
+Needs a trained model in models/ (python setup.py), like the server.
+
+Usage: python benchmarks/check_inputs.py [--backend numpy]
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from load_test import ROOT, encode_frame
+
+MALFORMED = [
+    ('frame without comma', {'frame': 'nocomma'}),
+    ('frame not a string', {'frame': 123}),
+    ('frame null', {'frame': None}),
+    ('frame bad base64', {'frame': 'data:image/jpeg;base64,@@@'}),
+    ('frame empty', {'frame': 'data:image/jpeg;base64,'}),
+    ('frame not an image', {'frame': 'data:image/jpeg;base64,AAAA'}),
+    ('landmarks wrong length', {'landmarks': [0.5] * 10}),
+    ('landmarks not numbers', {'landmarks': ['a'] * 63}),
+    ('session not a string', {'landmarks': [0.5] * 63, 'session': 7}),
+    ('no payload', {'session': 'x'}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', help="HANDLY_BACKEND for this run (keras, tf_function, tflite, numpy)")
+    args = parser.parse_args()
+
+    if args.backend:
+        os.environ['HANDLY_BACKEND'] = args.backend
+    os.chdir(ROOT)  # app.py loads models/ and templates/ relative to the repo root
+    sys.path.insert(0, ROOT)
+    import app
+    import asgi
+    from starlette.testclient import TestClient
+
+    failures = []
+
+    def check(name, ok):
+        print(f"{'PASS' if ok else 'FAIL'}  {name}")
+        if not ok:
+            failures.append(name)
+
+    frame = encode_frame(np.random.default_rng(0).integers(0, 255, (240, 320, 3), dtype=np.uint8))
+    landmarks = np.random.default_rng(1).random(app.LANDMARK_DIM, dtype=np.float32)
+    clients = [('app', app.app.test_client(), lambda r: r.get_json()),
+               ('asgi', TestClient(asgi.app), lambda r: r.json())]
+    for server, client, body in clients:
+        well_formed = [
+            ('landmarks', {'json': {'landmarks': landmarks.tolist(), 'session': 'check'}}),
+            ('no hand', {'json': {'landmarks': None, 'session': 'check'}}),
+            ('binary', {'data': landmarks.astype('<f4').tobytes(), 'headers': {'Content-Type': 'application/octet-stream'}}),
+            ('frame', {'json': {'frame': frame, 'session': 'check'}}),
+        ]
+        for name, kwargs in well_formed:
+            response = client.post('/predict', **kwargs)
+            check(f"{server}: {name} -> 200", response.status_code == 200 and 'ready' in body(response))
+        for name, payload in MALFORMED:
+            response = client.post('/predict', json=payload)
+            check(f"{server}: {name} -> 400", response.status_code == 400 and 'error' in body(response))
+        response = client.post('/predict?session=check', data=b'\x00\x01\x02',
+                               headers={'Content-Type': 'application/octet-stream'})
+        check(f"{server}: binary not float32 -> 400", response.status_code == 400)
+
+    for name, payload in MALFORMED:
+        if 'frame' not in payload:
+            continue
+        try:
+            app.decode_ws_message(json.dumps(payload), 'check')
+            ok = False
+        except ValueError:
+            ok = True
+        check(f"ws: {name} raises ValueError", ok)
+
+    print(f"\n{len(failures)} failed" if failures else "\nAll checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
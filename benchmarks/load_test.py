@@ -0,0 +1,400 @@
+"""
+Load generator and regression check for /predict
+Simulates N sessions, each posting one frame every 1/fps seconds over its
+own keep-alive connection, against a running server (app.py or asgi.py).
+Reports throughput, error count and latency percentiles per concurrency
+level, plus the server's CPU use and RSS read from /proc (the server
+process and its children, so cluster.py workers are included).
+
+Payloads:
+    landmarks  random 63-float rows (client-side MediaPipe path)
+    image      one synthetic gray JPEG (server-side MediaPipe path)
+    video      real frames replayed as JPEGs: demo_videos/*.mp4 by default,
+               or --frames with video files / directories of recorded images;
+               each session loops over a clip from its own offset
+
+--serve app|asgi starts the server itself (from the repo root, with the
+current environment) and stops it afterwards; otherwise pass --pid, or the
+PID listening on the URL's port is looked up in /proc.
+
+--save-baseline stores the results as JSON; --baseline compares against a
+stored run and exits 1 when a level regresses by more than --tolerance
+(throughput down, p95/p99 latency or CPU per request up, new errors).
+
+Usage:
+    python benchmarks/load_test.py --url http://localhost:8080 --sessions 50 --fps 10 --duration 20
+    python benchmarks/load_test.py --payload image   # server-side MediaPipe path
+    python benchmarks/load_test.py --serve asgi --payload video --save-baseline benchmarks/baseline.json
+    python benchmarks/load_test.py --serve asgi --payload video --baseline benchmarks/baseline.json
+"""
+import argparse
+import base64
+import glob
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+from urllib.parse import urlparse
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+# Regression checks: (metric, True if higher is better)
+CHECKED_METRICS = [('throughput', True), ('p95_ms', False), ('p99_ms', False), ('cpu_ms_per_request', False)]
+
+
+def landmark_payload(rng):
+    return rng.random(63, dtype=np.float32).astype('<f4').tobytes()
+
+
+def encode_frame(frame, quality=80):
+    ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return 'data:image/jpeg;base64,' + base64.b64encode(encoded.tobytes()).decode()
+
+
+def image_payload(width=480, height=360):
+    return encode_frame(np.full((height, width, 3), 128, dtype=np.uint8))
+
+
+def load_clips(paths, max_side=480, max_frames=300):
+    """Each path (video file or directory of frame images) -> list of JPEG data URLs, encoded once"""
+    clips = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(f for f in glob.glob(os.path.join(path, '*')) if f.lower().endswith(IMAGE_EXTENSIONS))
+            frames = (cv2.imread(f) for f in files[:max_frames])
+        else:
+            frames = read_video(path, max_frames)
+        encoded = []
+        for frame in frames:
+            if frame is None:
+                continue
+            scale = max_side / max(frame.shape[:2])
+            if scale < 1:
+                frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            encoded.append(encode_frame(frame))
+        if encoded:
+            clips.append(encoded)
+    return clips
+
+
+def read_video(path, max_frames):
+    cap = cv2.VideoCapture(path)
+    while max_frames > 0:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        max_frames -= 1
+        yield frame
+    cap.release()
+
+
+class Session(threading.Thread):
+    def __init__(self, url, payload, fps, deadline, results, seed, clips=None):
+        super().__init__(daemon=True)
+        self.url = url
+        self.payload = payload
+        self.interval = 1.0 / fps
+        self.deadline = deadline
+        self.results = results
+        self.session_id = uuid.uuid4().hex[:12]
+        self.rng = np.random.default_rng(seed)
+        if clips:
+            self.clip = clips[seed % len(clips)]
+            self.position = (seed * 7) % len(self.clip)  # sessions don't move in lockstep
+
+    def request(self):
+        if self.payload == 'landmarks':
+            return (f'/predict?session={self.session_id}', landmark_payload(self.rng),
+                    {'Content-Type': 'application/octet-stream'})
+        if self.payload == 'video':
+            image = self.clip[self.position]
+            self.position = (self.position + 1) % len(self.clip)
+        else:
+            image = self.image
+        body = json.dumps({'frame': image, 'session': self.session_id})
+        return '/predict', body, {'Content-Type': 'application/json'}
+
+    def run(self):
+        self.image = image_payload() if self.payload == 'image' else None
+        conn = http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=30)
+        next_send = time.perf_counter()
+        while next_send < self.deadline:
+            now = time.perf_counter()
+            if now < next_send:
+                time.sleep(next_send - now)
+            path, body, headers = self.request()
+            start = time.perf_counter()
+            try:
+                conn.request('POST', path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                ok = response.status == 200
+                ready = ok and json.loads(data).get('ready', False)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=30)
+                ok, ready = False, False
+            self.results.append((start, time.perf_counter() - start, ok, ready))
+            # Fixed schedule: a slow response delays this session, it doesn't add requests
+            next_send = max(next_send + self.interval, time.perf_counter())
+        conn.close()
+
+
+class ProcessTree:
+    """CPU seconds and RSS of a process plus all its descendants, from /proc"""
+
+    def __init__(self, pid):
+        self.pid = pid
+
+    @staticmethod
+    def _stat(pid):
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return int(fields[1]), (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # ppid, utime + stime
+
+    def pids(self):
+        children = {}
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    children.setdefault(self._stat(entry)[0], []).append(int(entry))
+                except (OSError, IndexError):
+                    continue  # exited meanwhile
+        tree, stack = [], [self.pid]
+        while stack:
+            pid = stack.pop()
+            tree.append(pid)
+            stack.extend(children.get(pid, []))
+        return tree
+
+    def cpu_seconds(self):
+        total = 0.0
+        for pid in self.pids():
+            try:
+                total += self._stat(pid)[1]
+            except OSError:
+                continue
+        return total
+
+    def rss_mb(self):
+        total = 0
+        for pid in self.pids():
+            try:
+                with open(f'/proc/{pid}/status') as f:
+                    for line in f:
+                        if line.startswith('VmRSS:'):
+                            total += int(line.split()[1])
+            except OSError:
+                continue
+        return total / 1024
+
+
+def listening_pid(port):
+    """PID of the process listening on a local TCP port, or None (needs /proc access to its fds)"""
+    inodes = set()
+    for table in ('/proc/net/tcp', '/proc/net/tcp6'):
+        try:
+            with open(table) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    if fields[3] == '0A' and int(fields[1].rsplit(':', 1)[1], 16) == port:  # 0A = LISTEN
+                        inodes.add(fields[9])
+        except OSError:
+            continue
+    targets = {f'socket:[{inode}]' for inode in inodes}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            for fd in os.listdir(f'/proc/{entry}/fd'):
+                if os.readlink(f'/proc/{entry}/fd/{fd}') in targets:
+                    return int(entry)
+        except OSError:
+            continue
+    return None
+
+
+def run_load(url, sessions, fps, duration, payload, warmup=2.0, clips=None, process=None):
+    """Run one load level; returns a summary dict (cpu/rss fields are None without a process)"""
+    results = []
+    start = time.perf_counter()
+    deadline = start + warmup + duration
+    threads = [Session(urlparse(url), payload, fps, deadline, results, seed, clips) for seed in range(sessions)]
+    for t in threads:
+        t.start()
+
+    cpu_start = rss_peak = None
+    if process is not None:
+        time.sleep(max(start + warmup - time.perf_counter(), 0))
+        cpu_start = process.cpu_seconds()
+        rss_peak = process.rss_mb()
+        while any(t.is_alive() for t in threads):
+            time.sleep(0.5)
+            rss_peak = max(rss_peak, process.rss_mb())
+        cpu_used = process.cpu_seconds() - cpu_start
+    for t in threads:
+        t.join()
+
+    measured = [r for r in results if r[0] >= start + warmup]
+    latencies = np.array([r[1] for r in measured if r[2]]) * 1000
+    errors = sum(1 for r in measured if not r[2])
+    summary = {
+        'sessions': sessions,
+        'fps': fps,
+        'payload': payload,
+        'requests': len(measured),
+        'errors': errors,
+        'throughput': len(measured) / duration,
+        'ready_rate': sum(1 for r in measured if r[3]) / max(len(measured), 1),
+    }
+    for q in (50, 95, 99):
+        summary[f'p{q}_ms'] = float(np.percentile(latencies, q)) if len(latencies) else None
+    summary['max_ms'] = float(latencies.max()) if len(latencies) else None
+    summary['cpu_percent'] = cpu_used / duration * 100 if process is not None else None
+    summary['cpu_ms_per_request'] = cpu_used * 1000 / max(len(measured), 1) if process is not None else None
+    summary['rss_mb'] = rss_peak
+    return summary
+
+
+def print_summary(s):
+    def fmt(v, width=8):
+        return f"{v:{width}.1f}" if v is not None else " " * (width - 1) + "-"
+    print(f"{s['sessions']:8d}{s['throughput']:10.1f}{s['errors']:8d}"
+          f"{fmt(s['p50_ms'])}{fmt(s['p95_ms'])}{fmt(s['p99_ms'])}{fmt(s['max_ms'])}"
+          f"{fmt(s['cpu_percent'])}{fmt(s['cpu_ms_per_request'], 10)}{fmt(s['rss_mb'])}")
+
+
+def compare_to_baseline(results, baseline, key_fields, checks, tolerance):
+    """
+    Regressions of `results` against `baseline` (lists of dicts) for the
+    entries whose key_fields match. checks: [(metric, higher_is_better)].
+    Returns a list of human-readable regression messages.
+    """
+    previous = {tuple(entry[k] for k in key_fields): entry for entry in baseline}
+    regressions = []
+    for entry in results:
+        key = tuple(entry[k] for k in key_fields)
+        old = previous.get(key)
+        if old is None:
+            continue
+        label = ', '.join(f'{k}={v}' for k, v in zip(key_fields, key))
+        for metric, higher_is_better in checks:
+            new_value, old_value = entry.get(metric), old.get(metric)
+            if new_value is None or not old_value:
+                continue
+            change = (new_value - old_value) / old_value
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{label}: {metric} {old_value:.2f} -> {new_value:.2f} ({change:+.0%})")
+        if entry.get('errors', 0) > old.get('errors', 0) + 0.005 * entry.get('requests', 0):
+            regressions.append(f"{label}: errors {old['errors']} -> {entry['errors']}")
+    return regressions
+
+
+def check_baseline(results, path, key_fields, checks, tolerance):
+    """Print the comparison with the stored baseline; returns True when nothing regressed"""
+    with open(path) as f:
+        baseline = json.load(f)['results']
+    regressions = compare_to_baseline(results, baseline, key_fields, checks, tolerance)
+    print(f"\nBaseline {path} (tolerance {tolerance:.0%}): "
+          + (f"{len(regressions)} regression(s)" if regressions else "no regressions"))
+    for message in regressions:
+        print(f"  REGRESSION  {message}")
+    return not regressions
+
+
+def save_baseline(results, path, **context):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(dict(context, created=time.strftime('%Y-%m-%d %H:%M:%S'), cpus=os.cpu_count(),
+                       results=results), f, indent=2)
+    print(f"\nBaseline saved to {path}")
+
+
+def start_server(kind, port):
+    """Launch app.py or asgi.py from the repo root; returns the Popen once /stats answers"""
+    if kind == 'app':
+        command = [sys.executable, 'app.py']  # app.py always listens on 8080
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(port), '--log-level', 'warning']
+    proc = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 300
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{kind} server exited with code {proc.returncode}")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/stats', timeout=2):
+                return proc
+        except OSError:
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError(f"{kind} server did not become ready")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8080')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[10, 50, 100])
+    parser.add_argument('--fps', type=float, default=10)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--payload', choices=['landmarks', 'image', 'video'], default='landmarks')
+    parser.add_argument('--frames', nargs='+',
+                        help="video files or directories of recorded frames for --payload video "
+                             "(default: demo_videos/*.mp4)")
+    parser.add_argument('--serve', choices=['app', 'asgi'], help="start this server for the run")
+    parser.add_argument('--pid', type=int, help="server PID for CPU/RSS (default: the process listening on the port)")
+    parser.add_argument('--baseline', help="fail if results regress against this baseline JSON")
+    parser.add_argument('--save-baseline', help="write the results to this baseline JSON")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative regression (default 0.2)")
+    args = parser.parse_args()
+
+    clips = None
+    if args.payload == 'video':
+        paths = args.frames or sorted(glob.glob(os.path.join(ROOT, 'demo_videos', '*.mp4')))
+        clips = load_clips(paths)
+        if not clips:
+            sys.exit("No frames to replay: pass --frames or run download_demo.py")
+
+    port = urlparse(args.url).port or 80
+    if args.serve == 'app':
+        port = 8080
+        args.url = 'http://127.0.0.1:8080'
+    server = start_server(args.serve, port) if args.serve else None
+    try:
+        pid = server.pid if server else args.pid or listening_pid(port)
+        process = ProcessTree(pid) if pid else None
+
+        print("=" * 90)
+        print(f"LOAD TEST {args.url}  payload={args.payload}  fps={args.fps:g}  {args.duration:g}s per level"
+              + (f"  server pid {pid}" if pid else "  (server CPU/RSS unavailable: pass --pid)"))
+        print("=" * 90)
+        print(f"{'sessions':>8s}{'req/s':>10s}{'errors':>8s}{'p50 ms':>8s}{'p95 ms':>8s}{'p99 ms':>8s}"
+              f"{'max ms':>8s}{'cpu %':>8s}{'cpu ms/req':>10s}{'rss MB':>8s}")
+        results = []
+        for n in args.sessions:
+            summary = run_load(args.url, n, args.fps, args.duration, args.payload, clips=clips, process=process)
+            print_summary(summary)
+            results.append(summary)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.save_baseline:
+        save_baseline(results, args.save_baseline, server=args.serve or args.url, duration=args.duration)
+    if args.baseline and not check_baseline(results, args.baseline, ('sessions', 'fps', 'payload'),
+                                            CHECKED_METRICS, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Microbenchmarks for the /predict stages in isolation
+Imports the server module (app.py, so the configured backend, pools and
+session store are the real ones) and times, call by call:
+    decode            base64 JPEG -> BGR frame (decode_image)
+    landmarks/static  extract_landmarks through the Hands pool
+    landmarks/track   extract_landmarks through a session's tracking Hands
+    buffer            buffer_frame: features + append to the session ring
+    inference/bN      backend.predict on N (30, dim) windows
+Frames come from demo_videos/*.mp4 or --frames (video files or directories
+of recorded images), else a synthetic frame, so it runs offline anywhere.
+
+--save-baseline / --baseline work as in load_test.py (median and p99 per
+benchmark, relative --tolerance).
+
+Usage: python benchmarks/microbench.py [--frames clip.mp4 ...] [--repeats 200] [--backend numpy]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from load_test import IMAGE_EXTENSIONS, ROOT, check_baseline, encode_frame, read_video, save_baseline
+
+CHECKED_METRICS = [('median_ms', False), ('p99_ms', False)]
+
+
+def load_frames(paths, limit=120, max_side=480):
+    frames = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(f for f in glob.glob(os.path.join(path, '*')) if f.lower().endswith(IMAGE_EXTENSIONS))
+            frames.extend(cv2.imread(f) for f in files[:limit])
+        else:
+            frames.extend(read_video(path, limit))
+    frames = [f for f in frames if f is not None][:limit]
+    for i, frame in enumerate(frames):
+        scale = max_side / max(frame.shape[:2])
+        if scale < 1:
+            frames[i] = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return frames
+
+
+def bench(name, fn, inputs, repeats):
+    """Call fn on inputs round-robin; returns per-call latency stats in ms"""
+    fn(inputs[0])  # warm-up (graph construction, tracing)
+    samples = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn(inputs[i % len(inputs)])
+        samples[i] = time.perf_counter() - start
+    samples *= 1000
+    return {'name': name, 'calls': repeats, 'median_ms': float(np.median(samples)),
+            'p99_ms': float(np.percentile(samples, 99)), 'mean_ms': float(samples.mean())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', nargs='+', help="video files or directories of recorded frames")
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--backend', help="HANDLY_BACKEND for this run (keras, tf_function, tflite, numpy)")
+    parser.add_argument('--baseline')
+    parser.add_argument('--save-baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.backend:
+        os.environ['HANDLY_BACKEND'] = args.backend
+    os.environ['HANDLY_BATCH_MAX_SIZE'] = '1'  # time the model itself, not the batcher's wait
+    os.chdir(ROOT)  # app.py loads models/ relative to the repo root
+    sys.path.insert(0, ROOT)
+    import app
+
+    frames = load_frames(args.frames or sorted(glob.glob('demo_videos/*.mp4')))
+    source = f"{len(frames)} recorded frames"
+    if not frames:
+        frames = [np.random.default_rng(0).integers(0, 255, (360, 480, 3), dtype=np.uint8)]
+        source = "synthetic frame (no demo_videos/)"
+    encoded = [encode_frame(frame) for frame in frames]
+
+    rng = np.random.default_rng(0)
+    rows = [rng.random(app.LANDMARK_DIM, dtype=np.float32) for _ in range(64)]
+    results = [
+        bench('decode', app.decode_image, encoded, args.repeats),
+        bench('landmarks/static', lambda f: app.extract_landmarks(f), frames, args.repeats),
+    ]
+    if app.trackers is not None:
+        results.append(bench('landmarks/track', lambda f: app.extract_landmarks(f, 'microbench'), frames,
+                             args.repeats))
+    results.append(bench('buffer', lambda row: app.buffer_frame('microbench', row), rows, args.repeats * 10))
+    for batch in (1, 8, 32):
+        windows = [rng.random((batch, app.SEQUENCE_LENGTH, app.FEATURE_DIM), dtype=np.float32) for _ in range(4)]
+        results.append(bench(f'inference/b{batch}', app.backend.predict, windows, max(args.repeats // batch, 20)))
+
+    print("=" * 60)
+    print(f"MICROBENCHMARKS  backend={app.backend.name}  {source}  {os.cpu_count()} cores")
+    print("=" * 60)
+    print(f"{'stage':<20s}{'calls':>8s}{'median ms':>11s}{'p99 ms':>10s}{'mean ms':>10s}")
+    for r in results:
+        print(f"{r['name']:<20s}{r['calls']:8d}{r['median_ms']:11.3f}{r['p99_ms']:10.3f}{r['mean_ms']:10.3f}")
+
+    if args.save_baseline:
+        save_baseline(results, args.save_baseline, backend=app.backend.name, frames=source)
+    passed = (check_baseline(results, args.baseline, ('name',), CHECKED_METRICS, args.tolerance)
+              if args.baseline else True)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == '__main__':
+    main()
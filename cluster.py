@@ -0,0 +1,195 @@
+"""
+Multi-process deployment: N worker servers behind a session-affine router
+Each worker is a separate `uvicorn asgi:app` process with its own GIL,
+MediaPipe pool and session buffers. The router sends every request for a
+session to the same worker (crc32 of the session ID), so in-process
+buffers, trackers and streaming state keep working.
+
+Model weights are exported once to models/sign_classifier_numpy/ and every
+worker memory-maps them read-only with the NumPy backend, so the weights
+live once in the page cache and no worker loads or traces the Keras model.
+Workers still import TensorFlow: MediaPipe (landmarks.py) imports it.
+
+Usage: python cluster.py --workers 4 --port 8080
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import zlib
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from inference import numpy_weights_dir
+from metrics import merge_prometheus, render_prometheus
+
+MODEL_PATH = "models/sign_classifier.keras"
+
+# Hop-by-hop and framing headers are the proxy's own business
+SKIP_HEADERS = {'host', 'connection', 'keep-alive', 'transfer-encoding', 'content-length',
+                'content-encoding', 'upgrade', 'te', 'trailer', 'proxy-connection'}
+
+
+def ensure_weights():
+    """Export NumPy weights in a child process so TensorFlow never loads in the master"""
+    if not os.path.exists(os.path.join(numpy_weights_dir(MODEL_PATH), 'layers.json')):
+        print("Exporting NumPy weights...")
+        subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'inference.py'),
+                        MODEL_PATH], check=True)
+
+
+def worker_env(workers, backend):
+    env = dict(os.environ)
+    cores = os.cpu_count() or 1
+    env.setdefault('HANDLY_BACKEND', backend)
+    env.setdefault('HANDLY_WEIGHTS_MMAP', '1')
+    # Split the cores between workers instead of oversubscribing them
+    env.setdefault('HANDLY_HANDS_POOL_SIZE', str(max(1, cores // workers)))
+    env.setdefault('HANDLY_ASGI_CPU_WORKERS', str(max(1, cores // workers)))
+    env.setdefault('OMP_NUM_THREADS', str(max(1, cores // workers)))
+    return env
+
+
+def start_worker(port, env):
+    return subprocess.Popen([sys.executable, '-m', 'uvicorn', 'asgi:app',
+                             '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'], env=env)
+
+
+def wait_ready(port, proc, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"worker on port {port} exited with code {proc.returncode}")
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/stats', timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"worker on port {port} did not start within {timeout}s")
+
+
+def supervise(procs, ports, env, stop):
+    """Restart workers that die; their sessions start over with empty buffers"""
+    while not stop.wait(2.0):
+        for i, proc in enumerate(procs):
+            if proc.poll() is not None:
+                print(f"Worker on port {ports[i]} exited with code {proc.returncode}, restarting")
+                procs[i] = start_worker(ports[i], env)
+
+
+def session_of(request, body):
+    """Session ID from the X-Session-Id header, ?session=, or the JSON body as a last resort"""
+    session_id = request.headers.get('x-session-id') or request.query_params.get('session')
+    if session_id:
+        return session_id
+    if body and request.headers.get('content-type', '').startswith('application/json'):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return 'default'
+        if isinstance(data, dict) and isinstance(data.get('session'), str):
+            return data['session']
+    return 'default'
+
+
+def make_router(worker_ports):
+    clients = [httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', timeout=30.0,
+                                 limits=httpx.Limits(max_connections=None, max_keepalive_connections=256))
+               for port in worker_ports]
+
+    def pick(session_id):
+        return clients[zlib.crc32(session_id.encode()) % len(clients)]
+
+    async def forward(request):
+        body = await request.body()
+        client = pick(session_of(request, body))
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in SKIP_HEADERS}
+        try:
+            upstream = await client.request(request.method, request.url.path, params=request.query_params,
+                                            content=body, headers=headers)
+        except httpx.HTTPError as e:
+            return JSONResponse({'error': f'worker unavailable: {e}'}, status_code=502)
+        out_headers = {k: v for k, v in upstream.headers.items() if k.lower() not in SKIP_HEADERS}
+        return Response(upstream.content, status_code=upstream.status_code, headers=out_headers)
+
+    async def stats(request):
+        async def one(client):
+            try:
+                return (await client.get('/stats')).json()
+            except (httpx.HTTPError, ValueError) as e:
+                return {'error': str(e)}
+        return JSONResponse({'workers': await asyncio.gather(*(one(c) for c in clients))})
+
+    async def metrics(request):
+        """Every worker's /metrics with a worker="<i>" label, plus handly_worker_up per worker"""
+        async def one(client):
+            try:
+                response = await client.get('/metrics')
+                response.raise_for_status()
+                return response.text
+            except httpx.HTTPError:
+                return None
+        texts = await asyncio.gather(*(one(c) for c in clients))
+        up = render_prometheus([('handly_worker_up', 'gauge', "Whether the worker answered this scrape",
+                                 [({'worker': i}, int(text is not None)) for i, text in enumerate(texts)])])
+        merged = merge_prometheus([({'worker': i}, text) for i, text in enumerate(texts) if text is not None])
+        return Response(up + merged, media_type='text/plain; version=0.0.4')
+
+    return Starlette(routes=[
+        Route('/', forward),
+        Route('/predict', forward, methods=['POST']),
+        Route('/reset', forward, methods=['POST']),
+        Route('/stats', stats),
+        Route('/metrics', metrics),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run N recognition workers behind a session-affine router")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--worker-base-port', type=int, default=9100)
+    parser.add_argument('--backend', default='numpy', help="worker inference backend (numpy shares mmapped weights)")
+    args = parser.parse_args()
+
+    if args.backend == 'numpy':
+        ensure_weights()
+
+    env = worker_env(args.workers, args.backend)
+    ports = [args.worker_base_port + i for i in range(args.workers)]
+    procs = [start_worker(port, env) for port in ports]
+
+    stop = threading.Event()
+
+    def stop_workers():
+        stop.set()
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait()
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for port, proc in zip(ports, procs):
+            wait_ready(port, proc)
+        print(f"\n{args.workers} workers ready on ports {ports[0]}-{ports[-1]} ({args.backend} backend)")
+        print(f"Open http://localhost:{args.port} in Chrome\n")
+        threading.Thread(target=supervise, args=(procs, ports, env, stop), daemon=True).start()
+
+        import uvicorn
+        uvicorn.run(make_router(ports), host='0.0.0.0', port=args.port, log_level='warning')
+    finally:
+        stop_workers()
+
+
+if __name__ == '__main__':
+    main()
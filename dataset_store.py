@@ -0,0 +1,157 @@
+"""
+Consolidated landmark dataset, memory-mapped for training
+All sequences live back to back in one float32 (or float16) file with an index of end
+offsets, so the whole dataset is a handful of files instead of one .npy
+per video plus a pickled copy. Opening it reads only the small index;
+sequence(i) is a zero-copy view into the mapped file.
+
+Layout under the dataset root (raw little-endian arrays):
+    sequences.f32  every sequence's frames, (total frames, dim)
+                   (sequences.f16 for a float16 store)
+    ends.i64       end row of each sequence (start = previous end)
+    labels.i32     class index per sequence
+    split.u8       TRAIN (0) or TEST (1) per sequence
+    keys.txt       feature cache key per sequence, one per line
+    meta.json      dim, dtype, classes, extractor/feature params and the committed counts
+
+New sequences are appended to the files and committed by rewriting
+meta.json; anything past the committed counts (a crashed append) is
+truncated the next time the store is opened.
+"""
+import json
+import os
+
+import numpy as np
+
+TRAIN, TEST = 0, 1
+TEST_FRACTION = 0.2
+
+_FILES = {'sequences': 'sequences.f32', 'ends': 'ends.i64', 'labels': 'labels.i32', 'split': 'split.u8'}
+_DTYPES = {'sequences': '<f4', 'ends': '<i8', 'labels': '<i4', 'split': 'u1'}
+
+
+def assign_split(video_sha256, test_fraction=TEST_FRACTION):
+    """Split by video content hash, so a video never changes sides as the dataset grows"""
+    return TEST if int(video_sha256[:8], 16) < test_fraction * 0x100000000 else TRAIN
+
+
+class DatasetStore:
+    """Append-only ragged sequence store; reopened (and reset) per extractor config"""
+
+    def __init__(self, root, dim, classes, params=None, dtype='float32'):
+        self.root = root
+        self.dim = dim
+        self.dtype = np.dtype(dtype).name
+        self.classes = list(classes)
+        self.params = params
+        self._files = dict(_FILES, sequences='sequences.f16' if self.dtype == 'float16' else _FILES['sequences'])
+        self._dtypes = dict(_DTYPES, sequences='<f2' if self.dtype == 'float16' else _DTYPES['sequences'])
+        os.makedirs(root, exist_ok=True)
+        meta = self._read_meta()
+        if meta is None or ((meta['dim'], meta.get('dtype', 'float32'), meta['classes'], meta['params'])
+                            != (dim, self.dtype, self.classes, params)):
+            # Different features or label space: the old rows can't be mixed in
+            meta = {'dim': dim, 'dtype': self.dtype, 'classes': self.classes, 'params': params,
+                    'count': 0, 'frames': 0}
+        self._truncate(meta['count'], meta['frames'])
+        self._commit(meta)
+        self._open()
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _read_meta(self):
+        try:
+            with open(self._path('meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _commit(self, meta):
+        tmp_path = self._path('meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path('meta.json'))
+        self.meta = meta
+
+    def _truncate(self, count, frames):
+        """Cut every file back to the committed counts"""
+        rows = {'sequences': frames * self.dim, 'ends': count, 'labels': count, 'split': count}
+        for name, filename in self._files.items():
+            with open(self._path(filename), 'ab') as f:
+                f.truncate(rows[name] * np.dtype(self._dtypes[name]).itemsize)
+        keys = []
+        if os.path.exists(self._path('keys.txt')):
+            with open(self._path('keys.txt')) as f:
+                keys = f.read().split()[:count]
+        with open(self._path('keys.txt'), 'w') as f:
+            f.write(''.join(key + '\n' for key in keys))
+
+    def _map(self, name, shape):
+        if not shape[0]:
+            return np.empty(shape, dtype=self._dtypes[name])
+        return np.memmap(self._path(self._files[name]), dtype=self._dtypes[name], mode='r', shape=shape)
+
+    def _open(self):
+        count, frames = self.meta['count'], self.meta['frames']
+        self.sequences = self._map('sequences', (frames, self.dim))
+        self.ends = self._map('ends', (count,))
+        self.labels = self._map('labels', (count,))
+        self.split = self._map('split', (count,))
+        with open(self._path('keys.txt')) as f:
+            self.keys = f.read().split()
+        self._key_set = set(self.keys)
+
+    def __len__(self):
+        return self.meta['count']
+
+    def __contains__(self, key):
+        return key in self._key_set
+
+    def append_many(self, items):
+        """Append (key, sequence, label, split) items and commit once; returns how many"""
+        count, frames = self.meta['count'], self.meta['frames']
+        files = {name: open(self._path(filename), 'ab') for name, filename in self._files.items()}
+        files['keys'] = open(self._path('keys.txt'), 'a')
+        try:
+            for key, seq, label, split in items:
+                seq = np.asarray(seq, dtype=self._dtypes['sequences']).reshape(-1, self.dim)
+                frames += len(seq)
+                count += 1
+                files['sequences'].write(seq.tobytes())
+                files['ends'].write(np.array([frames], dtype=self._dtypes['ends']).tobytes())
+                files['labels'].write(np.array([label], dtype=self._dtypes['labels']).tobytes())
+                files['split'].write(np.array([split], dtype=self._dtypes['split']).tobytes())
+                files['keys'].write(key + '\n')
+        finally:
+            for f in files.values():
+                f.close()
+        added = count - self.meta['count']
+        if added:
+            self._commit(dict(self.meta, count=count, frames=frames))
+            self._open()
+        return added
+
+    def clear(self):
+        self._truncate(0, 0)
+        self._commit(dict(self.meta, count=0, frames=0))
+        self._open()
+
+    def sequence(self, i):
+        """(frames, dim) view into the mapped file"""
+        start = self.ends[i - 1] if i else 0
+        return self.sequences[start:self.ends[i]]
+
+    def lengths(self):
+        return np.diff(self.ends, prepend=0)
+
+    def indices(self, split):
+        return np.flatnonzero(self.split == split)
+
+    def padded(self, indices, length):
+        """(len(indices), length, dim) float32 batch: first `length` frames, zero-padded"""
+        out = np.zeros((len(indices), length, self.dim), dtype=np.float32)
+        for row, i in enumerate(indices):
+            seq = self.sequence(i)[:length]
+            out[row, :len(seq)] = seq
+        return out
@@ -1,10 +1,12 @@
 """
 Download one video per word for demo purposes
 """
-import json
-import urllib.request
 import ssl
 import os
+from collections import defaultdict
+
+from downloader import Downloader, is_youtube
+from wlasl_index import WLASLIndex
 
 ssl._create_default_https_context = ssl._create_unverified_context
 
@@ -14,46 +16,35 @@ WORDS = ['hello', 'bye', 'yes', 'no', 'help', 'please', 'sorry', 'who', 'what',
 OUTPUT_DIR = 'demo_videos'
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# Load WLASL
-with open('WLASL_v0.3.json', 'r') as f:
-    wlasl = json.load(f)
+# Load WLASL (compiled index, rebuilt if the JSON changed)
+index = WLASLIndex()
 
 print("Downloading one video per word...")
 print("=" * 40)
 
-for entry in wlasl:
-    gloss = entry['gloss'].lower()
-    
-    if gloss in WORDS:
-        # Find first non-YouTube URL
-        for inst in entry['instances']:
-            url = inst.get('url', '')
-            
-            # Skip YouTube (often broken)
-            if not url or 'youtube' in url.lower():
-                continue
-            
-            out_path = f'{OUTPUT_DIR}/{gloss}.mp4'
-            
-            if os.path.exists(out_path):
-                print(f"✓ {gloss}.mp4 (already exists)")
-                break
-            
-            try:
-                urllib.request.urlretrieve(url, out_path)
-                print(f"✓ {gloss}.mp4")
-                break
-            except Exception as e:
-                continue
-        else:
-            print(f"✗ {gloss} - no working URL found")
+# Every non-YouTube URL (YouTube is often broken) is a candidate for the word's
+# file; each word tries its candidates in order until one works
+candidates = defaultdict(list)
+for word in WORDS:
+    for inst in index.instances(word):
+        url = inst.get('url') or ''
+        if url and not is_youtube(url):
+            candidates[word].append((url, f'{OUTPUT_DIR}/{word}.mp4'))
+
+results = Downloader().run(candidates, need={word: 1 for word in WORDS})
+
+for word in WORDS:
+    statuses = [status for _, _, status in results.get(word, [])]
+    if 'exists' in statuses:
+        print(f"✓ {word}.mp4 (already exists)")
+    elif 'ok' not in statuses:
+        print(f"✗ {word} - no working URL found")
 
 print("=" * 40)
 print(f"\nVideos saved to: {OUTPUT_DIR}/")
 
 # List what we got
-files = os.listdir(OUTPUT_DIR)
+files = [f for f in os.listdir(OUTPUT_DIR) if f.endswith('.mp4')]
 print(f"Downloaded: {len(files)} videos")
 for f in sorted(files):
     print(f"  - {f}")
-
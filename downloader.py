@@ -0,0 +1,290 @@
+"""
+Concurrent, resumable video downloader shared by setup.py and scripts/
+Downloads run on a bounded thread pool with a minimum interval between
+requests to the same host, and transient failures (timeouts, resets, 429,
+5xx) are retried with exponential backoff. Each download streams into
+<path>.part and is renamed into place only when complete. An interrupted
+.part is resumed with an HTTP Range request on the next attempt.
+
+Outcomes are kept in a JSON manifest (download_manifest.json by default):
+    ok      downloaded to `path`
+    failed  transient errors outlasted the retries; tried again next run
+    dead    permanent (4xx such as 404/410, unknown host, an error page
+            instead of a video, removed YouTube video); skipped on later
+            runs without any network call
+YouTube URLs are fetched with the yt-dlp command line tool.
+"""
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+MANIFEST_PATH = 'download_manifest.json'
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+CHUNK_SIZE = 64 * 1024
+RETRY_HTTP_CODES = {408, 425, 429}  # and every 5xx; other HTTP errors are dead
+YTDLP_DEAD_MARKERS = ('Video unavailable', 'Private video', 'has been removed', 'account associated',
+                      'This video is not available', 'Unsupported URL')
+
+
+def is_youtube(url):
+    return 'youtube' in url or 'youtu.be' in url
+
+
+class DeadLink(Exception):
+    """The URL will never work; don't retry it"""
+
+
+class RetryAfter(Exception):
+    """Retryable HTTP status; honors the server's Retry-After when it is in seconds"""
+
+    def __init__(self, error):
+        super().__init__(f"HTTP {error.code}")
+        try:
+            self.delay = min(float(error.headers.get('Retry-After')), 60.0)
+        except (TypeError, ValueError):
+            self.delay = None
+
+
+class Manifest:
+    """Thread-safe URL -> outcome record, saved atomically at most every `save_interval` seconds"""
+
+    def __init__(self, path, save_interval=2.0):
+        self.path = path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, url):
+        with self._lock:
+            return self.entries.get(url)
+
+    def record(self, url, status, path, error=None, attempts=0):
+        with self._lock:
+            self.entries[url] = {'status': status, 'path': path, 'error': error,
+                                 'attempts': attempts, 'updated': time.time()}
+            due = time.monotonic() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self.entries, indent=1)
+            self._last_save = time.monotonic()
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+
+    def counts(self):
+        with self._lock:
+            counts = defaultdict(int)
+            for entry in self.entries.values():
+                counts[entry['status']] += 1
+            return dict(counts)
+
+
+class HostRateLimiter:
+    """At most `rate` request starts per second per host"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next[host])
+            self._next[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class Downloader:
+    """
+    Bounded-concurrency downloader. fetch() handles one URL; run() schedules
+    groups of candidate URLs, e.g. the instances of each sign, and can stop
+    a group once it has enough videos.
+    """
+
+    def __init__(self, manifest_path=MANIFEST_PATH, workers=8, per_host_rate=1.0, retries=3, backoff=1.0,
+                 timeout=30.0, min_bytes=1000, retry_dead=False, verbose=True):
+        self.manifest = Manifest(manifest_path)
+        self.workers = workers
+        self.limiter = HostRateLimiter(per_host_rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.min_bytes = min_bytes
+        self.retry_dead = retry_dead
+        self.verbose = verbose
+
+    def fetch(self, url, path):
+        """
+        Download url to path; returns (status, detail), status one of
+        ok/exists/dead/failed. run() saves the manifest when it finishes;
+        callers using fetch() directly call manifest.save() themselves.
+        """
+        if os.path.exists(path):
+            return 'exists', None
+        entry = self.manifest.get(url)
+        if entry and entry['status'] == 'dead' and not self.retry_dead:
+            return 'dead', entry['error']
+
+        if is_youtube(url) and shutil.which('yt-dlp') is None:
+            return 'failed', "yt-dlp is not installed (pip install yt-dlp)"  # not the URL's fault: not recorded
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        error = None
+        for attempt in range(1, self.retries + 2):
+            self.limiter.wait(urlparse(url).hostname or '')
+            try:
+                if is_youtube(url):
+                    self._ytdlp(url, path)
+                else:
+                    self._http(url, path)
+            except DeadLink as e:
+                self.manifest.record(url, 'dead', path, str(e), attempt)
+                return 'dead', str(e)
+            except RetryAfter as e:
+                error = str(e)
+                delay = e.delay
+            except (OSError, http.client.HTTPException, subprocess.TimeoutExpired) as e:
+                error = f"{type(e).__name__}: {e}"
+                delay = None
+            else:
+                self.manifest.record(url, 'ok', path, None, attempt)
+                return 'ok', None
+            if attempt <= self.retries:
+                time.sleep(delay if delay is not None else self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+        self.manifest.record(url, 'failed', path, error, self.retries + 1)
+        return 'failed', error
+
+    def _http(self, url, path):
+        part = path + '.part'
+        have = os.path.getsize(part) if os.path.exists(part) else 0
+        headers = {'User-Agent': USER_AGENT, 'Accept': 'video/mp4,video/*,*/*'}
+        if 'aslpro' in url:
+            headers['Referer'] = 'http://www.aslpro.com/cgi-bin/aslpro/aslpro.cgi'
+        if have:
+            headers['Range'] = f'bytes={have}-'
+        try:
+            response = urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 416 and have:
+                # Range past the end: the .part already holds the whole file
+                return self._finish(part, path)
+            if e.code in RETRY_HTTP_CODES or e.code >= 500:
+                raise RetryAfter(e)
+            raise DeadLink(f"HTTP {e.code}")
+        except urllib.error.URLError as e:
+            if isinstance(e.reason, socket.gaierror):
+                raise DeadLink(f"unknown host: {e.reason}")
+            raise
+
+        with response:
+            if response.status != 206:
+                have = 0  # server ignored the Range: start over
+            expected = response.headers.get('Content-Length')
+            expected = have + int(expected) if expected is not None else None
+            with open(part, 'ab' if have else 'wb') as f:
+                while True:
+                    chunk = response.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+        size = os.path.getsize(part)
+        if expected is not None and size < expected:
+            raise ConnectionError(f"connection closed at {size} of {expected} bytes")
+        return self._finish(part, path)
+
+    def _finish(self, part, path):
+        if os.path.getsize(part) < self.min_bytes:
+            os.remove(part)
+            raise DeadLink(f"response under {self.min_bytes} bytes (error page?)")
+        os.replace(part, path)
+
+    def _ytdlp(self, url, path):
+        # yt-dlp writes its own .part file and resumes it (--continue is the default)
+        result = subprocess.run(['yt-dlp', '-q', '--no-warnings', '--retries', '3', '-f', 'mp4/best',
+                                 '-o', path, url], capture_output=True, text=True, timeout=180)
+        if result.returncode != 0 or not os.path.exists(path):
+            message = (result.stderr.strip().splitlines() or ['yt-dlp failed'])[-1]
+            if any(marker in result.stderr for marker in YTDLP_DEAD_MARKERS):
+                raise DeadLink(message[:200])
+            raise OSError(message[:200])
+
+    def run(self, groups, need=None):
+        """
+        groups: {name: [(url, path), ...]} in preference order.
+        need: optional {name: n}; a group stops submitting once n of its
+        files exist or downloaded. Returns {name: [(url, path, status), ...]}.
+        """
+        pending = {name: iter(jobs) for name, jobs in groups.items()}
+        have = defaultdict(int)
+        in_flight = defaultdict(int)
+        results = defaultdict(list)
+        futures = {}
+        with ThreadPoolExecutor(self.workers) as pool:
+            while True:
+                # Round-robin over groups so one big group can't starve the rest
+                progressed = True
+                while progressed and len(futures) < self.workers:
+                    progressed = False
+                    for name in list(pending):
+                        if len(futures) >= self.workers:
+                            break
+                        limit = need.get(name) if need else None
+                        if limit is not None and have[name] + in_flight[name] >= limit:
+                            continue
+                        job = next(pending[name], None)
+                        if job is None:
+                            del pending[name]
+                            continue
+                        futures[pool.submit(self.fetch, *job)] = (name, job)
+                        in_flight[name] += 1
+                        progressed = True
+                if not futures:
+                    break
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, (url, path) = futures.pop(future)
+                    in_flight[name] -= 1
+                    status, detail = future.result()
+                    if status in ('ok', 'exists'):
+                        have[name] += 1
+                    results[name].append((url, path, status))
+                    self._report(path, status, detail)
+        self.manifest.save()
+        return dict(results)
+
+    def _report(self, path, status, detail):
+        if not self.verbose or status == 'exists':
+            return
+        mark = {'ok': '✓', 'dead': '✗', 'failed': '!'}[status]
+        print(f"  {mark} {path}" + (f" ({detail})" if detail else ""))
+
+
+def summarize(results):
+    """{status: count} over run() results"""
+    counts = defaultdict(int)
+    for jobs in results.values():
+        for _, _, status in jobs:
+            counts[status] += 1
+    return dict(counts)
@@ -0,0 +1,198 @@
+"""
+Parallel landmark extraction for the training videos
+Each video is one task on a process pool. Every worker process creates a
+single tracking-mode Hands instance and reuses it for all of its videos,
+so the graph is built once per worker instead of once per clip.
+
+Results go to a FeatureCache keyed by video content and extractor_params(),
+written atomically, so an interrupted run resumes where it stopped and a
+config change only re-extracts what it invalidates.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from feature_cache import FeatureCache, cache_key
+
+MIN_FRAMES = 5
+# Bump when extract_video() changes in a way that alters its output
+EXTRACTOR_VERSION = 2
+HANDS_PARAMS = {
+    'static_image_mode': False,  # tracking: palm detection only runs until a hand is locked
+    'max_num_hands': 1,
+    'min_detection_confidence': 0.5,
+    'min_tracking_confidence': 0.5,
+}
+
+_hands = None
+_blank = np.zeros((64, 64, 3), dtype=np.uint8)
+
+
+def create_hands():
+    return mp.solutions.hands.Hands(**HANDS_PARAMS)
+
+
+def extractor_params(stride=1, target_fps=None, max_side=None, max_frames=None):
+    """Everything that determines extract_video()'s output, for the cache key"""
+    return {
+        'extractor': EXTRACTOR_VERSION,
+        'mediapipe': mp.__version__,
+        'hands': HANDS_PARAMS,
+        'stride': stride,
+        'target_fps': target_fps,
+        'max_side': max_side,
+        'max_frames': max_frames,
+    }
+
+
+def reset_tracking(hands):
+    """
+    Drop any hand tracked from the previous clip. Palm detection is skipped
+    while the last frame had a hand, so one blank frame (no landmarks) makes
+    the next clip start from a fresh detection without rebuilding the graph.
+    """
+    hands.process(_blank)
+
+
+def frame_stride(cap, stride=1, target_fps=None):
+    """Keep every `stride`-th frame, or derive the stride from the clip's FPS and target_fps"""
+    if target_fps:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if fps > 0:
+            return max(1, round(fps / target_fps))
+    return max(1, stride)
+
+
+def extract_video(vid_path, hands, stride=1, target_fps=None, max_side=None, max_frames=None):
+    """
+    (frames with a hand, 63) landmarks for one video.
+
+    Skipped frames are only grabbed, never decoded into an image; frames
+    whose longer side exceeds max_side are downscaled before MediaPipe;
+    decoding stops once max_frames hand frames are collected.
+    """
+    reset_tracking(hands)
+    cap = cv2.VideoCapture(vid_path)
+    step = frame_stride(cap, stride, target_fps)
+    landmarks_seq = []
+    index = -1
+
+    while cap.isOpened():
+        if not cap.grab():
+            break
+        index += 1
+        if index % step:
+            continue
+        ret, frame = cap.retrieve()
+        if not ret:
+            break
+
+        if max_side and max(frame.shape[:2]) > max_side:
+            scale = max_side / max(frame.shape[:2])
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        results = hands.process(rgb)
+
+        if results.multi_hand_landmarks:
+            hand = results.multi_hand_landmarks[0]
+            frame_landmarks = []
+            for lm in hand.landmark:
+                frame_landmarks.extend([lm.x, lm.y, lm.z])
+            landmarks_seq.append(frame_landmarks)
+            if max_frames and len(landmarks_seq) >= max_frames:
+                break
+
+    cap.release()
+    return np.array(landmarks_seq)
+
+
+def _init_worker():
+    global _hands
+    _hands = create_hands()
+
+
+def _run_task(vid_path, cache_root, key, meta, options):
+    """Worker side of one task: extract into the cache; returns frames with a hand"""
+    start = time.perf_counter()
+    seq = extract_video(vid_path, _hands, **options)
+    meta = dict(meta, frames=len(seq), seconds=round(time.perf_counter() - start, 3), created=time.time())
+    FeatureCache(cache_root).put(key, seq, meta)
+    return len(seq)
+
+
+def list_videos(data_dir, signs):
+    """(sign, video path) for every .mp4 under data_dir/<sign>/"""
+    videos = []
+    for sign in signs:
+        sign_dir = os.path.join(data_dir, sign)
+        for vid_file in sorted(os.listdir(sign_dir)):
+            if vid_file.endswith('.mp4'):
+                videos.append((sign, os.path.join(sign_dir, vid_file)))
+    return videos
+
+
+def plan_extraction(videos, cache, params):
+    """
+    Cache key for every (sign, video path); returns (keys, tasks), where
+    tasks are the (sign, video path, key, metadata) entries not cached yet.
+    """
+    keys, tasks = [], []
+    for sign, vid_path in videos:
+        digest = cache.video_hash(vid_path)
+        key = cache_key(digest, params)
+        keys.append(key)
+        if not cache.has(key):
+            tasks.append((sign, vid_path, key, {'video': vid_path, 'sha256': digest, 'params': params}))
+    cache.save_index()
+    return keys, tasks
+
+
+def extract_all(tasks, workers, cache, **options):
+    """
+    Run plan_extraction() tasks on `workers` processes, printing progress;
+    returns (saved, too_short, failed). `options` go to extract_video().
+    """
+    saved = too_short = failed = 0
+    start = time.perf_counter()
+
+    if not tasks:
+        return saved, too_short, failed
+    if workers <= 1:
+        _init_worker()
+        results = ((task, _call(_run_task, task[1], cache.root, task[2], task[3], options)) for task in tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        futures = {pool.submit(_run_task, task[1], cache.root, task[2], task[3], options): task for task in tasks}
+        results = ((futures[f], _call(f.result)) for f in as_completed(futures))
+
+    try:
+        for done, ((sign, vid_path, _, _), (frames, error)) in enumerate(results, 1):
+            name = f"{sign}/{os.path.basename(vid_path)}"
+            if error is not None:
+                failed += 1
+                status = f"✗ {name}: {error}"
+            elif frames >= MIN_FRAMES:
+                saved += 1
+                status = f"✓ {name} ({frames} frames)"
+            else:
+                too_short += 1
+                status = f"- {name} (only {frames} frames with a hand)"
+            elapsed = time.perf_counter() - start
+            eta = elapsed / done * (len(tasks) - done)
+            print(f"[{done}/{len(tasks)}] {status}  {elapsed:.0f}s elapsed, ~{eta:.0f}s left")
+    finally:
+        if workers > 1:
+            pool.shutdown(cancel_futures=True)
+    return saved, too_short, failed
+
+
+def _call(fn, *args):
+    """(result, None) or (None, exception): one bad video doesn't stop the run"""
+    try:
+        return fn(*args), None
+    except Exception as e:
+        return None, e
@@ -0,0 +1,132 @@
+"""
+Content-addressed cache of extracted landmark sequences
+An entry's key is the SHA-256 of (video content hash, extractor parameters),
+and the parameters include the MediaPipe version, so changing a confidence
+threshold, the stride or the MediaPipe install only recomputes the entries
+it actually invalidates. Renaming or moving a video keeps its entries.
+
+Layout under the cache root:
+    entries/<key[:2]>/<key>.npy   landmarks, (frames with a hand, 63)
+    entries/<key[:2]>/<key>.json  metadata, written last: an entry without
+                                  it is incomplete and treated as missing
+    hashes.json                   video path -> (size, mtime_ns, sha256), so
+                                  unchanged videos aren't re-read on every run
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+def cache_key(video_sha256, params):
+    blob = json.dumps({'video': video_sha256, 'params': params}, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, write):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class FeatureCache:
+    """Landmark sequences on disk, keyed by video content and extractor config"""
+
+    def __init__(self, root):
+        self.root = root
+        self.entries_dir = os.path.join(root, 'entries')
+        self.index_path = os.path.join(root, 'hashes.json')
+        self._hashes = None  # loaded on first video_hash(); workers only put()
+
+    def _paths(self, key):
+        base = os.path.join(self.entries_dir, key[:2], key)
+        return base + '.npy', base + '.json'
+
+    def video_hash(self, path):
+        """SHA-256 of the file, memoized by (path, size, mtime)"""
+        if self._hashes is None:
+            try:
+                with open(self.index_path) as f:
+                    self._hashes = json.load(f)
+            except (OSError, ValueError):
+                self._hashes = {}
+        st = os.stat(path)
+        path = os.path.abspath(path)
+        memo = self._hashes.get(path)
+        if memo and memo[0] == st.st_size and memo[1] == st.st_mtime_ns:
+            return memo[2]
+        digest = file_sha256(path)
+        self._hashes[path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def save_index(self):
+        if self._hashes is not None:
+            os.makedirs(self.root, exist_ok=True)
+            _write_atomic(self.index_path, lambda f: f.write(json.dumps(self._hashes).encode()))
+
+    def has(self, key):
+        return os.path.exists(self._paths(key)[1])
+
+    def load(self, key, mmap_mode=None):
+        return np.load(self._paths(key)[0], mmap_mode=mmap_mode)
+
+    def metadata(self, key):
+        with open(self._paths(key)[1]) as f:
+            return json.load(f)
+
+    def put(self, key, array, meta):
+        array_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(array_path), exist_ok=True)
+        _write_atomic(array_path, lambda f: np.save(f, array))
+        _write_atomic(meta_path, lambda f: f.write(json.dumps(meta, indent=1).encode()))
+
+    def keys(self):
+        if not os.path.isdir(self.entries_dir):
+            return
+        for shard in sorted(os.listdir(self.entries_dir)):
+            for name in sorted(os.listdir(os.path.join(self.entries_dir, shard))):
+                if name.endswith('.json'):
+                    yield name[:-len('.json')]
+
+    def gc(self, keep):
+        """
+        Delete entries whose key isn't in `keep`, incomplete entries and
+        leftover temp files, and forget hashes of videos that no longer
+        exist. Returns (files removed, bytes freed).
+        """
+        removed = freed = 0
+        if os.path.isdir(self.entries_dir):
+            for shard in os.listdir(self.entries_dir):
+                shard_dir = os.path.join(self.entries_dir, shard)
+                for name in os.listdir(shard_dir):
+                    key = name.split('.', 1)[0]
+                    complete = os.path.exists(os.path.join(shard_dir, key + '.json'))
+                    if key in keep and complete and not name.endswith('.tmp'):
+                        continue
+                    path = os.path.join(shard_dir, name)
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                    removed += 1
+                if not os.listdir(shard_dir):
+                    os.rmdir(shard_dir)
+        if self._hashes is not None:
+            self._hashes = {p: memo for p, memo in self._hashes.items() if os.path.exists(p)}
+            self.save_index()
+        return removed, freed
+
+    def stats(self):
+        entries = size = 0
+        for key in self.keys():
+            entries += 1
+            size += sum(os.path.getsize(p) for p in self._paths(key))
+        return {'entries': entries, 'bytes': size}
@@ -0,0 +1,84 @@
+"""
+Landmark features shared by training and serving
+Turns MediaPipe's 21 (x, y, z) hand landmarks into the model input, on
+whole arrays at once: a single (63,) frame, a (T, 63) / (T, 21, 3)
+sequence or a batch of sequences go through the same NumPy expressions.
+
+A feature spec is a small dict saved with each model (label_map.pkl for
+the sign classifier, a .features.json sidecar for GestureRecognizer), so
+the server always computes what the model was trained on. Models saved
+without a spec get the raw landmarks.
+
+    normalize   translate so the wrist is the origin, divide by the
+                wrist -> middle-finger MCP distance (position/scale invariant)
+    angles      15 angles between consecutive bones of each finger (radians)
+    distances   10 pairwise fingertip distances
+    float16     round the features to half precision (half-size dataset store)
+
+Frames without a hand (all-zero landmarks) stay all-zero.
+"""
+import numpy as np
+
+FEATURE_VERSION = 1
+NUM_LANDMARKS = 21
+LANDMARK_DIM = NUM_LANDMARKS * 3
+WRIST, MIDDLE_MCP = 0, 9
+# Landmark chains from the wrist out to each fingertip (thumb .. pinky)
+FINGERS = ((0, 1, 2, 3, 4), (0, 5, 6, 7, 8), (0, 9, 10, 11, 12), (0, 13, 14, 15, 16), (0, 17, 18, 19, 20))
+FINGERTIPS = (4, 8, 12, 16, 20)
+_TIP_A, _TIP_B = np.triu_indices(len(FINGERTIPS), k=1)
+_BONE_START = np.array([chain[:-1] for chain in FINGERS])  # (5, 4)
+_BONE_END = np.array([chain[1:] for chain in FINGERS])
+EPS = 1e-6
+
+
+def make_spec(normalize=True, angles=True, distances=True, float16=False):
+    return {'version': FEATURE_VERSION, 'normalize': normalize, 'angles': angles,
+            'distances': distances, 'float16': float16}
+
+
+RAW_SPEC = make_spec(normalize=False, angles=False, distances=False)
+
+
+def is_raw(spec):
+    return spec is None or not (spec['normalize'] or spec['angles'] or spec['distances'] or spec['float16'])
+
+
+def feature_dim(spec):
+    if spec is None:
+        return LANDMARK_DIM
+    return (LANDMARK_DIM + (_BONE_START.size - len(FINGERS) if spec['angles'] else 0)
+            + (len(_TIP_A) if spec['distances'] else 0))
+
+
+def feature_dtype(spec):
+    return np.float16 if spec is not None and spec['float16'] else np.float32
+
+
+def compute_features(landmarks, spec):
+    """(..., 63) or (..., 21, 3) landmarks -> (..., feature_dim(spec)) features"""
+    points = np.asarray(landmarks, dtype=np.float32)
+    lead = points.shape[:-2] if points.shape[-2:] == (NUM_LANDMARKS, 3) else points.shape[:-1]
+    points = points.reshape(*lead, NUM_LANDMARKS, 3)
+    if is_raw(spec):
+        return points.reshape(*lead, LANDMARK_DIM)
+    present = np.any(points != 0, axis=(-2, -1))
+
+    if spec['normalize']:
+        points = points - points[..., WRIST:WRIST + 1, :]
+        scale = np.linalg.norm(points[..., MIDDLE_MCP, :], axis=-1)
+        points = points / np.maximum(scale, EPS)[..., np.newaxis, np.newaxis]
+
+    parts = [points.reshape(*lead, LANDMARK_DIM)]
+    if spec['angles']:
+        bones = points[..., _BONE_END, :] - points[..., _BONE_START, :]  # (..., 5, 4, 3)
+        bones = bones / np.maximum(np.linalg.norm(bones, axis=-1, keepdims=True), EPS)
+        cos = np.sum(bones[..., :-1, :] * bones[..., 1:, :], axis=-1)  # (..., 5, 3)
+        parts.append(np.arccos(np.clip(cos, -1.0, 1.0)).reshape(*lead, -1))
+    if spec['distances']:
+        tips = points[..., FINGERTIPS, :]
+        parts.append(np.linalg.norm(tips[..., _TIP_A, :] - tips[..., _TIP_B, :], axis=-1))
+
+    features = np.concatenate(parts, axis=-1).astype(np.float32)
+    features[~present] = 0.0
+    return features.astype(feature_dtype(spec), copy=False)
@@ -0,0 +1,365 @@
+"""
+Inference backends for the sign classifier LSTM
+All backends take a float32 batch of shape (B, 30, 63) and return (B, n_signs)
+class probabilities. Selected at startup with load_backend():
+  keras        - model.predict (reference, slowest per call)
+  tf_function  - cached tf.function traced once with a fixed input signature
+  tflite       - TFLite interpreter (uses models/sign_classifier.tflite if present)
+  numpy        - pure-NumPy forward pass over the trained weights; the backend
+                 itself never calls TensorFlow (MediaPipe still imports it)
+                 needed at serve time once weights are exported
+StreamingLSTM reuses the NumPy weights to advance per-session recurrent
+state one frame at a time instead of re-running the whole window.
+
+Export the TFLite model and NumPy weights next to the Keras model with:
+    python inference.py [models/sign_classifier.keras]
+"""
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+BACKENDS = ('keras', 'tf_function', 'tflite', 'numpy')
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)  # overflow-free logistic
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'tanh': np.tanh,
+    'sigmoid': _sigmoid,
+    'softmax': _softmax,
+}
+
+
+def numpy_weights_dir(model_path):
+    return os.path.splitext(model_path)[0] + '_numpy'
+
+
+def tflite_path(model_path):
+    return os.path.splitext(model_path)[0] + '.tflite'
+
+
+def _load_keras(model_path):
+    import tensorflow as tf
+    return tf.keras.models.load_model(model_path)
+
+
+class KerasBackend:
+    name = 'keras'
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, X):
+        return self.model.predict(X, verbose=0)
+
+
+class TFFunctionBackend:
+    """Keras model called through a tf.function traced once at startup"""
+    name = 'tf_function'
+
+    def __init__(self, model):
+        import tensorflow as tf
+        self._tf = tf
+        _, steps, features = model.input_shape
+        self._fn = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec([None, steps, features], tf.float32)],
+        )
+        self._fn.get_concrete_function()
+
+    def predict(self, X):
+        return self._fn(self._tf.convert_to_tensor(X, dtype=self._tf.float32)).numpy()
+
+
+class TFLiteBackend:
+    """TFLite interpreter, resized lazily when the batch size changes"""
+    name = 'tflite'
+
+    def __init__(self, model_content):
+        import tensorflow as tf
+        self._interpreter = tf.lite.Interpreter(model_content=model_content)
+        self._input = self._interpreter.get_input_details()[0]['index']
+        self._output = self._interpreter.get_output_details()[0]['index']
+        self._batch = None
+        self._lock = threading.Lock()  # interpreters are not thread-safe
+
+    @classmethod
+    def from_keras(cls, model):
+        return cls(convert_tflite(model))
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        with self._lock:
+            if X.shape[0] != self._batch:
+                self._interpreter.resize_tensor_input(self._input, X.shape)
+                self._interpreter.allocate_tensors()
+                self._batch = X.shape[0]
+            self._interpreter.set_tensor(self._input, X)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output).copy()
+
+
+class NumpyBackend:
+    """
+    Pure-NumPy forward pass for the Sequential LSTM/Dropout/Dense stack.
+    Keras LSTM gate order is (input, forget, cell, output); dropout is a
+    no-op at inference time.
+    """
+    name = 'numpy'
+
+    def __init__(self, layers):
+        self.layers = layers
+
+    @classmethod
+    def from_keras(cls, model):
+        layers = []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            config = layer.get_config()
+            if kind == 'LSTM':
+                kernel, recurrent, bias = layer.get_weights()
+                layers.append({
+                    'type': 'lstm',
+                    'return_sequences': config['return_sequences'],
+                    'activation': config['activation'],
+                    'recurrent_activation': config['recurrent_activation'],
+                    'kernel': kernel, 'recurrent_kernel': recurrent, 'bias': bias,
+                })
+            elif kind == 'Dense':
+                kernel, bias = layer.get_weights()
+                layers.append({
+                    'type': 'dense',
+                    'activation': config['activation'],
+                    'kernel': kernel, 'bias': bias,
+                })
+            elif kind in ('Dropout', 'InputLayer'):
+                continue
+            else:
+                raise ValueError(f"NumpyBackend does not support layer type {kind}")
+        return cls(layers)
+
+    def save(self, out_dir):
+        """One .npy per weight plus layers.json, so workers can np.load(mmap_mode='r')"""
+        os.makedirs(out_dir, exist_ok=True)
+        spec = []
+        for i, layer in enumerate(self.layers):
+            entry = {}
+            for key, value in layer.items():
+                if isinstance(value, np.ndarray):
+                    filename = f'{i}_{key}.npy'
+                    np.save(os.path.join(out_dir, filename), value.astype(np.float32))
+                    entry[key] = filename
+                else:
+                    entry[key] = value
+            spec.append(entry)
+        with open(os.path.join(out_dir, 'layers.json'), 'w') as f:
+            json.dump(spec, f, indent=2)
+
+    @classmethod
+    def load(cls, weights_dir, mmap_mode=None):
+        """mmap_mode='r' maps the weights read-only, so processes share one copy in the page cache"""
+        with open(os.path.join(weights_dir, 'layers.json')) as f:
+            spec = json.load(f)
+        layers = []
+        for entry in spec:
+            layer = {}
+            for key, value in entry.items():
+                if isinstance(value, str) and value.endswith('.npy'):
+                    # asarray drops the memmap subclass (no copy) so matmul results are plain arrays
+                    layer[key] = np.asarray(np.load(os.path.join(weights_dir, value), mmap_mode=mmap_mode))
+                else:
+                    layer[key] = value
+            layers.append(layer)
+        return cls(layers)
+
+    @staticmethod
+    def _lstm(x, layer):
+        kernel, recurrent = layer['kernel'], layer['recurrent_kernel']
+        act = ACTIVATIONS[layer['activation']]
+        rec_act = ACTIVATIONS[layer['recurrent_activation']]
+        batch, steps, _ = x.shape
+        units = recurrent.shape[0]
+
+        # Input projection for every timestep in one matmul; only h @ U is sequential
+        xw = x @ kernel + layer['bias']
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        outputs = np.empty((batch, steps, units), dtype=np.float32) if layer['return_sequences'] else None
+        for t in range(steps):
+            z = xw[:, t] + h @ recurrent
+            i = rec_act(z[:, :units])
+            f = rec_act(z[:, units:2 * units])
+            g = act(z[:, 2 * units:3 * units])
+            o = rec_act(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * act(c)
+            if outputs is not None:
+                outputs[:, t] = h
+        return outputs if outputs is not None else h
+
+    def predict(self, X):
+        x = np.asarray(X, dtype=np.float32)
+        for layer in self.layers:
+            if layer['type'] == 'lstm':
+                x = self._lstm(x, layer)
+            else:
+                x = ACTIVATIONS[layer['activation']](x @ layer['kernel'] + layer['bias'])
+        return x
+
+
+class StreamState:
+    """Per-session recurrent state for StreamingLSTM"""
+
+    def __init__(self, slots, units):
+        self.h = [np.zeros((slots, u), dtype=np.float32) for u in units]
+        self.c = [np.zeros((slots, u), dtype=np.float32) for u in units]
+        self.age = np.full(slots, -(1 << 30), dtype=np.int64)  # slots not started yet
+        self.frames = 0
+        self.last = None  # most recent class probabilities
+        self.lock = threading.Lock()
+
+    def reset(self):
+        for h, c in zip(self.h, self.c):
+            h.fill(0)
+            c.fill(0)
+        self.age.fill(-(1 << 30))
+        self.frames = 0
+        self.last = None
+
+
+class StreamingLSTM:
+    """
+    Sliding-window LSTM inference at O(1) timesteps per frame.
+
+    The windowed model restarts from a zero state at the first frame of
+    every window, so a single running state can't reproduce it. Instead
+    each state keeps one "slot" per window start: a new slot is zeroed
+    every `stride` frames, every slot advances by one timestep per frame
+    in a single batched matmul, and a slot is read out through the dense
+    head when it has seen exactly `window` frames.
+
+    With stride=1 this is numerically the same as re-running the last
+    `window` frames through NumpyBackend.predict (checked by
+    benchmarks/bench_streaming.py). Larger strides keep window/stride
+    slots and produce a fresh prediction every `stride` frames.
+    """
+
+    def __init__(self, backend, window=30, stride=1):
+        layers = backend.layers
+        n_lstm = 0
+        while n_lstm < len(layers) and layers[n_lstm]['type'] == 'lstm':
+            n_lstm += 1
+        if n_lstm == 0 or any(l['type'] != 'dense' for l in layers[n_lstm:]):
+            raise ValueError("StreamingLSTM needs LSTM layers followed by Dense layers")
+        if any(not l['return_sequences'] for l in layers[:n_lstm - 1]) or layers[n_lstm - 1]['return_sequences']:
+            raise ValueError("only the last LSTM layer may drop return_sequences")
+
+        self.lstm_layers = layers[:n_lstm]
+        self.head = layers[n_lstm:]
+        self.window = window
+        self.stride = stride
+        self.slots = -(-window // stride)
+        self.units = [l['recurrent_kernel'].shape[0] for l in self.lstm_layers]
+
+    def new_state(self):
+        return StreamState(self.slots, self.units)
+
+    def step(self, state, frame):
+        """Advance every slot by one frame; returns class probabilities when a window completes, else None"""
+        t = state.frames
+        if t % self.stride == 0:
+            k = (t // self.stride) % self.slots
+            for h, c in zip(state.h, state.c):
+                h[k] = 0
+                c[k] = 0
+            state.age[k] = 0
+
+        # Every slot sees the same input frame, so the first projection is computed once and broadcast
+        x = np.asarray(frame, dtype=np.float32).reshape(1, -1)
+        for li, layer in enumerate(self.lstm_layers):
+            units = self.units[li]
+            act = ACTIVATIONS[layer['activation']]
+            rec_act = ACTIVATIONS[layer['recurrent_activation']]
+            z = x @ layer['kernel'] + layer['bias'] + state.h[li] @ layer['recurrent_kernel']
+            i = rec_act(z[:, :units])
+            f = rec_act(z[:, units:2 * units])
+            g = act(z[:, 2 * units:3 * units])
+            o = rec_act(z[:, 3 * units:])
+            state.c[li] = f * state.c[li] + i * g
+            state.h[li] = o * act(state.c[li])
+            x = state.h[li]
+
+        state.age += 1
+        state.frames += 1
+        done = np.flatnonzero(state.age == self.window)
+        if done.size == 0:
+            return None
+
+        out = state.h[-1][done[:1]]
+        for layer in self.head:
+            out = ACTIVATIONS[layer['activation']](out @ layer['kernel'] + layer['bias'])
+        state.last = out[0]
+        return state.last
+
+
+def convert_tflite(model):
+    import tempfile
+    import tensorflow as tf
+    # Go through a SavedModel export: from_keras_model fails on Keras 3 models
+    with tempfile.TemporaryDirectory() as export_dir:
+        model.export(export_dir)
+        converter = tf.lite.TFLiteConverter.from_saved_model(export_dir)
+        # Keep the fused LSTM kernels; fall back to TF ops for anything else
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS,
+            tf.lite.OpsSet.SELECT_TF_OPS,
+        ]
+        return converter.convert()
+
+
+def load_backend(name, model_path, mmap=False):
+    """
+    Build the named backend, preferring exported artifacts next to model_path.
+    mmap=True memory-maps exported NumPy weights instead of reading them.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"unknown inference backend {name!r}, choose from {BACKENDS}")
+
+    if name == 'numpy' and os.path.exists(os.path.join(numpy_weights_dir(model_path), 'layers.json')):
+        return NumpyBackend.load(numpy_weights_dir(model_path), mmap_mode='r' if mmap else None)
+    if name == 'tflite' and os.path.exists(tflite_path(model_path)):
+        with open(tflite_path(model_path), 'rb') as f:
+            return TFLiteBackend(f.read())
+
+    model = _load_keras(model_path)
+    if name == 'keras':
+        return KerasBackend(model)
+    if name == 'tf_function':
+        return TFFunctionBackend(model)
+    if name == 'tflite':
+        return TFLiteBackend.from_keras(model)
+    return NumpyBackend.from_keras(model)
+
+
+if __name__ == '__main__':
+    model_path = sys.argv[1] if len(sys.argv) > 1 else 'models/sign_classifier.keras'
+    model = _load_keras(model_path)
+
+    NumpyBackend.from_keras(model).save(numpy_weights_dir(model_path))
+    print(f"✓ NumPy weights -> {numpy_weights_dir(model_path)}/")
+
+    with open(tflite_path(model_path), 'wb') as f:
+        f.write(convert_tflite(model))
+    print(f"✓ TFLite model -> {tflite_path(model_path)}")
@@ -0,0 +1,327 @@
+"""
+MediaPipe Hands helpers for the recognition server
+A Hands instance wraps a single calculator graph: it is not thread-safe and
+only processes one image at a time, so concurrent requests check one out
+of a bounded pool instead of sharing a module-level instance.
+
+Live webcam sessions can instead get their own tracking-mode instance
+(static_image_mode=False): once a hand is locked MediaPipe skips the palm
+detector and only runs the landmark model on the tracked region.
+
+HandROI crops each frame to the previous hand's bounding box plus a margin
+before MediaPipe sees it, and falls back to the full frame when there is
+no previous hand or the hand is lost in the crop.
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from metrics import Histogram
+
+WAIT_MS_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+ROI_MARGIN = 0.5     # added on every side, as a fraction of the hand box's longer side
+ROI_MIN_SIDE = 0.3   # smallest crop side, as a fraction of the frame's shorter side
+
+
+def landmarks_into(results, out):
+    """
+    Write the first hand's 21 (x, y, z) landmarks into `out` (63 float32)
+    in place, zero-filling when no hand was found. Returns hand_detected.
+    """
+    if not results.multi_hand_landmarks:
+        out.fill(0.0)
+        return False
+    i = 0
+    for lm in results.multi_hand_landmarks[0].landmark:
+        out[i] = lm.x
+        out[i + 1] = lm.y
+        out[i + 2] = lm.z
+        i += 3
+    return True
+
+
+def landmark_motion(a, b):
+    """Mean (x, y) displacement of the 21 landmarks between two 63-value rows, in normalized units"""
+    d = np.reshape(a, (21, 3))[:, :2] - np.reshape(b, (21, 3))[:, :2]
+    return float(np.sqrt((d * d).sum(axis=1)).mean())
+
+
+def bgr_to_rgb(image):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+class HandROI:
+    """
+    Region-of-interest state for one video stream.
+
+    process() runs MediaPipe on a square crop around the hand found in the
+    previous frame; the landmarks (and the results' landmark protos, so
+    drawing still works) are mapped back to full-frame normalized
+    coordinates. Without a previous hand, or if the crop loses it, the same
+    frame is processed in full. Not thread-safe: one instance per stream.
+    """
+
+    def __init__(self, margin=ROI_MARGIN, min_side=ROI_MIN_SIDE):
+        self.margin = margin
+        self.min_side = min_side
+        self.box = None  # normalized (x0, y0, x1, y1) of the last hand
+        self.cropped = 0
+        self.full = 0
+        self.lost = 0
+
+    def window(self, height, width):
+        """Pixel crop (left, top, right, bottom) for the next frame, or None for the full frame"""
+        if self.box is None:
+            return None
+        x0, y0, x1, y1 = self.box
+        side = max((x1 - x0) * width, (y1 - y0) * height) * (1 + 2 * self.margin)
+        half = max(side, self.min_side * min(height, width)) / 2
+        cx, cy = (x0 + x1) / 2 * width, (y0 + y1) / 2 * height
+        left, top = max(0, int(cx - half)), max(0, int(cy - half))
+        right, bottom = min(width, int(cx + half)), min(height, int(cy + half))
+        if right - left < 32 or bottom - top < 32 or (right - left == width and bottom - top == height):
+            return None
+        return left, top, right, bottom
+
+    def process(self, process_fn, frame, out, to_rgb=bgr_to_rgb):
+        """
+        process_fn maps an RGB image to MediaPipe results; frame is BGR and
+        to_rgb converts it (or the crop), so callers can time the conversion.
+        Writes the first hand's landmarks into `out` like landmarks_into()
+        and returns (results, hand_detected).
+        """
+        height, width = frame.shape[:2]
+        window = self.window(height, width)
+        if window is not None:
+            left, top, right, bottom = window
+            # Convert only the crop; cvtColor also makes it contiguous for MediaPipe
+            results = process_fn(to_rgb(frame[top:bottom, left:right]))
+            if results.multi_hand_landmarks:
+                sx, sy = (right - left) / width, (bottom - top) / height
+                for hand in results.multi_hand_landmarks:
+                    for lm in hand.landmark:
+                        lm.x = left / width + lm.x * sx
+                        lm.y = top / height + lm.y * sy
+                        lm.z = lm.z * sx  # z shares x's scale
+                self.cropped += 1
+                return results, self._remember(results, out)
+            self.lost += 1
+        self.full += 1
+        results = process_fn(to_rgb(frame))
+        return results, self._remember(results, out)
+
+    def _remember(self, results, out):
+        hand_detected = landmarks_into(results, out)
+        if hand_detected:
+            xs, ys = out[0::3], out[1::3]
+            self.box = (float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max()))
+        else:
+            self.box = None
+        return hand_detected
+
+    def reset(self):
+        self.box = None
+
+    def stats(self):
+        return {'cropped': self.cropped, 'full': self.full, 'lost': self.lost}
+
+
+class HandsPool:
+    """Bounded pool of MediaPipe Hands instances, created lazily up to `size`"""
+
+    def __init__(self, size, **hands_kwargs):
+        self.size = size
+        self.hands_kwargs = hands_kwargs
+        self.wait_ms = Histogram(WAIT_MS_BUCKETS)
+        self._idle = queue.LifoQueue()  # LIFO keeps recently used graphs warm
+        self._created = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            return mp.solutions.hands.Hands(**self.hands_kwargs)
+        with self._lock:
+            self._waiting += 1
+        try:
+            return self._idle.get()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    @contextmanager
+    def acquire(self):
+        start = time.perf_counter()
+        hands = self._checkout()
+        self.wait_ms.observe((time.perf_counter() - start) * 1000)
+        with self._lock:
+            self._in_use += 1
+        try:
+            yield hands
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(hands)
+
+    def process(self, rgb):
+        with self.acquire() as hands:
+            return hands.process(rgb)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self):
+        with self._lock:
+            created, in_use, waiting = self._created, self._in_use, self._waiting
+        return {
+            'size': self.size,
+            'created': created,
+            'in_use': in_use,
+            'waiting': waiting,
+            'wait_ms': self.wait_ms.snapshot(),
+        }
+
+
+class _Tracker:
+    __slots__ = ('hands', 'lock', 'last_used', 'closed')
+
+    def __init__(self, hands):
+        self.hands = hands
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.closed = False
+
+
+class SessionTrackers:
+    """
+    One tracking-mode Hands instance per live session.
+
+    Tracking state only makes sense for consecutive frames of the same
+    stream, so instances are never shared between sessions. Trackers idle
+    for longer than idle_ttl seconds are closed. Once max_sessions trackers
+    are live, frames of sessions without one go to fallback (e.g. a static
+    HandsPool's process) rather than evicting an active tracker, which
+    would rebuild a graph on every frame; a session gets a tracker when a
+    slot frees up. Without a fallback the least recently used tracker is
+    closed instead.
+    """
+
+    def __init__(self, idle_ttl=60.0, max_sessions=64, fallback=None, **hands_kwargs):
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.fallback = fallback
+        self.hands_kwargs = dict(hands_kwargs, static_image_mode=False)
+        self.created = 0
+        self.evicted = 0
+        self.fallbacks = 0
+        self._trackers = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + idle_ttl
+
+    def _full(self):
+        """Caller holds the lock"""
+        return self.fallback is not None and len(self._trackers) >= self.max_sessions
+
+    def _get(self, session_id):
+        """The session's tracker, or None when it should use the fallback"""
+        with self._lock:
+            tracker = self._trackers.get(session_id)
+            if tracker is not None:
+                self._trackers.move_to_end(session_id)
+                return tracker
+            full = self._full()
+        if full:
+            self.evict_idle()
+            with self._lock:
+                if self._full():
+                    self.fallbacks += 1
+                    return None
+
+        # Building a graph is slow; don't hold the registry lock meanwhile
+        new = _Tracker(mp.solutions.hands.Hands(**self.hands_kwargs))
+        evicted = []
+        with self._lock:
+            tracker = self._trackers.get(session_id)
+            if tracker is not None:
+                evicted.append(new)  # another request for this session won the race
+            elif self._full():
+                evicted.append(new)  # other sessions took the free slots meanwhile
+                self.fallbacks += 1
+            else:
+                while len(self._trackers) >= self.max_sessions:
+                    evicted.append(self._trackers.popitem(last=False)[1])
+                    self.evicted += 1
+                self._trackers[session_id] = tracker = new
+                self.created += 1
+        self._close(evicted)
+        return tracker
+
+    @staticmethod
+    def _close(trackers):
+        for tracker in trackers:
+            with tracker.lock:  # wait for any in-flight process() call
+                tracker.closed = True
+                tracker.hands.close()
+
+    def process(self, session_id, rgb):
+        while True:
+            tracker = self._get(session_id)
+            if tracker is None:
+                return self.fallback(rgb)
+            with tracker.lock:
+                if tracker.closed:  # evicted between lookup and use
+                    continue
+                results = tracker.hands.process(rgb)
+                tracker.last_used = time.monotonic()
+                break
+        if time.monotonic() >= self._next_sweep:
+            self.evict_idle()
+        return results
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            self._next_sweep = now + self.idle_ttl
+            idle = [sid for sid, t in self._trackers.items() if now - t.last_used > self.idle_ttl]
+            evicted = [self._trackers.pop(sid) for sid in idle]
+            self.evicted += len(evicted)
+        self._close(evicted)
+        return len(evicted)
+
+    def discard(self, session_id):
+        with self._lock:
+            tracker = self._trackers.pop(session_id, None)
+            if tracker is not None:
+                self.evicted += 1
+        if tracker is not None:
+            self._close([tracker])
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active': len(self._trackers),
+                'created': self.created,
+                'evicted': self.evicted,
+                'fallbacks': self.fallbacks,
+                'idle_ttl': self.idle_ttl,
+                'max_sessions': self.max_sessions,
+            }
@@ -0,0 +1,202 @@
+"""
+Lightweight in-process metrics for the recognition server
+Fixed-bucket histograms and counters, cheap enough to update on every
+request, rendered in the Prometheus text format for /metrics. merge_prometheus()
+combines the expositions of several workers under a worker label.
+
+StageTimers keeps one histogram per pipeline stage. While a request is
+being tracked (request_timings()), each timed stage is also recorded for
+that request so it can be returned in a Server-Timing header.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+INF = float('inf')
+
+
+def _label(bound):
+    return '+Inf' if bound == INF else bound
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus-style cumulative buckets"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (None if empty)"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+        if total == 0:
+            return None
+        rank = q * total
+        seen = 0
+        for bound, n in zip(self.buckets + (INF,), counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return INF
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = []
+        running = 0
+        for bound, n in zip(self.buckets + (INF,), counts):
+            running += n
+            cumulative.append((_label(bound), running))
+        return {
+            'buckets': cumulative,
+            'count': count,
+            'sum': total,
+            'p50': _label(self.quantile(0.5)),
+            'p99': _label(self.quantile(0.99)),
+        }
+
+
+class Counter:
+    """Monotonic counter"""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+
+class RequestTimings:
+    """Stage durations of one request, in the order they finished"""
+
+    def __init__(self):
+        self.stages = []
+
+    def add(self, stage, ms):
+        self.stages.append((stage, ms))
+
+    def header(self):
+        """Server-Timing header value, e.g. 'hands;dur=12.41, inference;dur=3.02'"""
+        return ', '.join(f'{stage};dur={ms:.2f}' for stage, ms in self.stages)
+
+
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+@contextmanager
+def request_timings():
+    """Track the stages timed in this context (and contexts copied from it) for one request"""
+    timings = RequestTimings()
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+class StageTimers:
+    """One latency histogram (ms) per named stage"""
+
+    def __init__(self, stages, buckets):
+        self.histograms = {stage: Histogram(buckets) for stage in stages}
+
+    def observe(self, stage, ms):
+        self.histograms[stage].observe(ms)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.add(stage, ms)
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - start) * 1000)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+
+def render_prometheus(families):
+    """
+    Prometheus text exposition format. families: [(name, type, help,
+    [(labels, value), ...])] where type is 'counter', 'gauge' or
+    'histogram' and a histogram's value is a Histogram.
+    """
+    lines = []
+    for name, kind, help_text, samples in families:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in samples:
+            if kind == 'histogram':
+                snapshot = value.snapshot()
+                for bound, count in snapshot['buckets']:
+                    lines.append(f'{name}_bucket{_format_labels(dict(labels, le=bound))} {count}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {snapshot["sum"]}')
+                lines.append(f'{name}_count{_format_labels(labels)} {snapshot["count"]}')
+            else:
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def _add_labels(sample, labels):
+    """Prepend labels to one exposition sample line ('name{a="1"} 3' or 'name 3')"""
+    end = min(i for i in (sample.find('{'), sample.find(' ')) if i >= 0)
+    extra = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    if sample[end] == '{':
+        rest = sample[end + 1:]
+        separator = '' if rest.startswith('}') else ','
+        return f'{sample[:end]}{{{extra}{separator}{rest}'
+    return f'{sample[:end]}{{{extra}}}{sample[end:]}'
+
+
+def merge_prometheus(sources):
+    """
+    Combine several exposition texts into one. sources: [(labels, text)];
+    every sample gets its source's labels (e.g. {'worker': '0'}) and the
+    samples of each family are regrouped under a single HELP/TYPE header,
+    as the format requires.
+    """
+    families = {}  # name -> [header lines, sample lines], in first-seen order
+    for labels, text in sources:
+        family = None
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            if line.startswith('#'):
+                parts = line.split(None, 3)
+                if len(parts) >= 3 and parts[1] in ('HELP', 'TYPE'):
+                    family = families.setdefault(parts[2], [[], []])
+                    if len(family[0]) < 2 and line not in family[0]:
+                        family[0].append(line)
+                continue
+            if family is None:
+                family = families.setdefault(line.split('{')[0].split()[0], [[], []])
+            family[1].append(_add_labels(line, labels))
+    lines = [line for header, samples in families.values() for line in header + samples]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,88 @@
+"""
+Flattened RandomForest evaluator for the gesture model
+The fitted StandardScaler + RandomForestClassifier are exported to one .npz
+of contiguous node arrays (every tree concatenated, child indices global).
+Prediction walks all trees for all rows at once: one vectorized step per
+tree level instead of scikit-learn's per-call validation and per-tree
+dispatch. Leaves point at themselves, so rows that reach a leaf early stay
+put while deeper trees finish.
+"""
+import numpy as np
+
+
+class FlatForest:
+    """predict_proba for a StandardScaler + RandomForestClassifier pair from flat NumPy arrays"""
+
+    def __init__(self, mean, scale, feature, threshold, left, right, value, roots, depth, classes):
+        self.mean = mean
+        self.scale = scale
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+        self.classes = classes
+
+    @classmethod
+    def from_sklearn(cls, model, scaler):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            leaf = tree.children_left == -1
+            index = np.arange(n)
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            lefts.append(np.where(leaf, index, tree.children_left) + offset)
+            rights.append(np.where(leaf, index, tree.children_right) + offset)
+            # Each tree votes with its normalized leaf distribution, as in DecisionTreeClassifier.predict_proba
+            counts = tree.value[:, 0, :]
+            values.append(counts / counts.sum(axis=1, keepdims=True))
+            roots.append(offset)
+            offset += n
+        return cls(
+            mean=np.asarray(scaler.mean_, dtype=np.float64),
+            scale=np.asarray(scaler.scale_, dtype=np.float64),
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            depth=max(estimator.tree_.max_depth for estimator in model.estimators_),
+            classes=np.asarray(model.classes_),
+        )
+
+    def save(self, path):
+        np.savez(path, mean=self.mean, scale=self.scale, feature=self.feature, threshold=self.threshold,
+                 left=self.left, right=self.right, value=self.value, roots=self.roots,
+                 depth=np.int32(self.depth), classes=self.classes)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{key: data[key] for key in data.files})
+
+    def predict_proba(self, X):
+        """(N, features) landmarks -> (N, classes) probabilities averaged over the trees"""
+        # Scaled in float32 like the trees' own input; this equals StandardScaler.transform on
+        # float32 landmarks, while float64 input there can round differently near a threshold.
+        # check_flat_forest.py checks label and probability parity (within TOLERANCE)
+        X = np.array(X, dtype=np.float32, ndmin=2)
+        X -= self.mean.astype(np.float32)
+        X /= self.scale.astype(np.float32)
+        rows = np.arange(len(X))[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node].mean(axis=1)
+
+    def predict(self, X):
+        """(labels, confidences) from a single pass"""
+        probabilities = self.predict_proba(X)
+        best = np.argmax(probabilities, axis=1)
+        return self.classes[best], probabilities[np.arange(len(best)), best]
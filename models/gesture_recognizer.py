@@ -6,23 +6,69 @@ Using MediaPipe for hand detection and a trained classifier for gesture recognit
 """
 
 import cv2
+import json
 import mediapipe as mp
 import numpy as np
 import pickle
 import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
 from pathlib import Path
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 import warnings
 
+# Shared MediaPipe helpers live in the top-level landmarks.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from features import compute_features, is_raw, make_spec
+from landmarks import HandROI, landmark_motion
+from models.flat_forest import FlatForest
+from streaming import LatestFrameSlot
+
 warnings.filterwarnings('ignore')
 
 
+class StageStats:
+    """Rolling FPS and mean latency of one live-mode stage"""
+    
+    def __init__(self, window=30):
+        self.ends = deque(maxlen=window)
+        self.durations = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, start):
+        end = time.perf_counter()
+        with self._lock:
+            self.ends.append(end)
+            self.durations.append(end - start)
+    
+    def fps(self):
+        with self._lock:
+            if len(self.ends) < 2:
+                return 0.0
+            return (len(self.ends) - 1) / max(self.ends[-1] - self.ends[0], 1e-9)
+    
+    def latency_ms(self):
+        with self._lock:
+            return sum(self.durations) / len(self.durations) * 1000 if self.durations else 0.0
+
+
 class GestureRecognizer:
     """Main gesture recognition system using MediaPipe and ML classifier"""
     
-    def __init__(self, model_path='gesture_model.pkl', scaler_path='scaler.pkl'):
-        """Initialize the gesture recognizer with MediaPipe and trained model"""
+    def __init__(self, model_path='gesture_model.pkl', scaler_path='scaler.pkl',
+                 adaptive=False, motion_threshold=0.01):
+        """
+        Initialize the gesture recognizer with MediaPipe and trained model.
+        adaptive=True crops MediaPipe's input to the last hand box plus a
+        margin (full frame when there is no hand) and reuses the last
+        prediction while the landmarks have moved less than
+        motion_threshold (mean displacement, normalized image units) since
+        the last classified frame.
+        """
         
         # Initialize MediaPipe Hands
         self.mp_hands = mp.solutions.hands
@@ -51,10 +97,21 @@ class GestureRecognizer:
         # Load trained model and scaler
         self.model_path = model_path
         self.scaler_path = scaler_path
+        self.forest_path = os.path.splitext(model_path)[0] + '.npz'
+        self.features_path = os.path.splitext(model_path)[0] + '.features.json'
+        self.feature_spec = None  # raw landmarks unless the model was saved with a feature spec
         self.model = None
         self.scaler = None
+        self.forest = None
         self.model_trained = False
         
+        # Adaptive mode: ROI cropping and motion-gated classification
+        self.roi = HandROI() if adaptive else None
+        self.motion_threshold = motion_threshold if adaptive else None
+        self.last_classified = None  # (landmarks, prediction, confidence)
+        self.classified = 0
+        self.reused = 0
+        
         self._load_model()
     
     def _load_model(self):
@@ -65,6 +122,9 @@ class GestureRecognizer:
                     self.model = pickle.load(f)
                 with open(self.scaler_path, 'rb') as f:
                     self.scaler = pickle.load(f)
+                if os.path.exists(self.features_path):
+                    with open(self.features_path) as f:
+                        self.feature_spec = json.load(f)
                 self.model_trained = True
                 print("✓ Loaded pre-trained model and scaler")
             except Exception as e:
@@ -72,9 +132,35 @@ class GestureRecognizer:
                 self.model_trained = False
         else:
             print("⚠ No pre-trained model found. Training mode will be available.")
+        
+        if self.model_trained:
+            self._load_forest()
+    
+    def _load_forest(self):
+        """Load the flattened forest, exporting it first if it is missing or older than the pickles"""
+        try:
+            stale = (not os.path.exists(self.forest_path)
+                     or os.path.getmtime(self.forest_path) < max(os.path.getmtime(self.model_path),
+                                                                 os.path.getmtime(self.scaler_path)))
+            if stale:
+                self._export_forest()
+            self.forest = FlatForest.load(self.forest_path)
+            print(f"✓ Loaded flattened forest from {self.forest_path}")
+        except Exception as e:
+            print(f"Flattened forest unavailable, using scikit-learn: {e}")
+            self.forest = None
+    
+    def _export_forest(self):
+        """Flatten the fitted scaler + forest into contiguous node arrays for fast inference"""
+        FlatForest.from_sklearn(self.model, self.scaler).save(self.forest_path)
     
     def extract_hand_landmarks(self, frame):
         """Extract hand landmarks from a frame using MediaPipe"""
+        if self.roi is not None:
+            landmarks = np.zeros(63, dtype=np.float32)
+            results, hand_detected = self.roi.process(self.hands.process, frame, landmarks)
+            return (landmarks if hand_detected else None), hand_detected, results
+        
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         results = self.hands.process(frame_rgb)
         
@@ -94,20 +180,56 @@ class GestureRecognizer:
         
         return landmarks, hand_detected, results
     
+    def classify(self, landmarks):
+        """
+        predict_gesture with motion gating in adaptive mode: if the hand has
+        barely moved since the last classified frame, reuse that result.
+        Pass None when no hand was found to drop the reusable result.
+        """
+        if landmarks is None:
+            self.last_classified = None
+            return None, 0.0
+        if (self.motion_threshold is not None and self.last_classified is not None
+                and landmark_motion(landmarks, self.last_classified[0]) < self.motion_threshold):
+            self.reused += 1
+            return self.last_classified[1], self.last_classified[2]
+        prediction, confidence = self.predict_gesture(landmarks)
+        self.classified += 1
+        self.last_classified = (landmarks.copy(), prediction, confidence)
+        return prediction, confidence
+    
+    def predict_batch(self, landmarks_array):
+        """
+        Predict gestures for N frames of landmarks, shape (N, 63), in one pass.
+        Labels come from the argmax of a single predict_proba call (what
+        RandomForestClassifier.predict does internally) instead of running the
+        forest a second time. Returns (labels, confidences) arrays of length N.
+        Uses the flattened forest when it is loaded.
+        """
+        if self.model is None or not self.model_trained:
+            return None, None
+        
+        X = np.asarray(landmarks_array, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis]
+        if not is_raw(self.feature_spec):
+            X = compute_features(X, self.feature_spec).astype(np.float32)
+        if self.forest is not None:
+            return self.forest.predict(X)
+        probabilities = self.model.predict_proba(self.scaler.transform(X))
+        best = np.argmax(probabilities, axis=1)
+        labels = self.model.classes_[best]
+        confidences = probabilities[np.arange(len(best)), best]
+        return labels, confidences
+    
     def predict_gesture(self, landmarks):
         """Predict gesture from hand landmarks"""
         if self.model is None or not self.model_trained:
             return None, 0.0
         
         try:
-            # Normalize landmarks using the scaler
-            landmarks_scaled = self.scaler.transform([landmarks])
-            
-            # Predict gesture
-            prediction = self.model.predict(landmarks_scaled)[0]
-            confidence = np.max(self.model.predict_proba(landmarks_scaled))
-            
-            return prediction, confidence
+            labels, confidences = self.predict_batch([landmarks])
+            return labels[0], float(confidences[0])
         except Exception as e:
             print(f"Error in prediction: {e}")
             return None, 0.0
@@ -123,8 +245,16 @@ class GestureRecognizer:
                 self.mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2)
             )
     
-    def run_live_recognition(self, camera_id=0):
-        """Run live gesture recognition from webcam"""
+    def run_live_recognition(self, camera_id=0, log_interval=5.0):
+        """
+        Run live gesture recognition from webcam.
+        Capture, inference and rendering run in separate stages: a capture
+        thread keeps only the latest camera frame, an inference thread runs
+        MediaPipe + the classifier on the newest frame it can get, and the
+        render loop shows every captured frame with the most recent result.
+        A slow inference step makes results arrive less often but never
+        stalls the display or queues up stale frames.
+        """
         cap = cv2.VideoCapture(camera_id)
         
         if not cap.isOpened():
@@ -135,6 +265,7 @@ class GestureRecognizer:
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
         cap.set(cv2.CAP_PROP_FPS, 30)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # don't let the driver queue old frames
         
         print("\n" + "="*60)
         print("GESTURE RECOGNITION SYSTEM - LIVE MODE")
@@ -148,55 +279,149 @@ class GestureRecognizer:
         print("  's' - Save frame with detected gesture")
         print("="*60 + "\n")
         
-        frame_count = 0
-        gesture_history = []
-        history_size = 5  # Smooth predictions using history
+        # The capture thread feeds each consumer its own one-slot mailbox, so
+        # inference and rendering both see the newest frame and skip the rest
+        inference_frames = LatestFrameSlot()
+        render_frames = LatestFrameSlot()
+        results = LatestFrameSlot()
+        stop = threading.Event()
+        stats = {name: StageStats() for name in ('capture', 'inference', 'render')}
+        
+        threads = [
+            threading.Thread(target=self._capture_loop, args=(cap, (inference_frames, render_frames), stop,
+                                                              stats['capture']), daemon=True),
+            threading.Thread(target=self._inference_loop, args=(inference_frames, results, stop, stats['inference']),
+                             daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
         
-        while True:
+        try:
+            self._render_loop(render_frames, results, stop, stats, log_interval)
+        finally:
+            stop.set()
+            inference_frames.close()
+            render_frames.close()
+            for thread in threads:
+                thread.join(timeout=2.0)
+            cap.release()
+            cv2.destroyAllWindows()
+        print("Live recognition ended.")
+    
+    def _capture_loop(self, cap, slots, stop, stats):
+        """Read camera frames as fast as the camera delivers them; only the newest is kept"""
+        while not stop.is_set():
+            start = time.perf_counter()
             ret, frame = cap.read()
             if not ret:
+                print("Camera stopped delivering frames")
+                stop.set()
                 break
-            
-            frame_count += 1
-            
             # Flip frame for selfie view
             frame = cv2.flip(frame, 1)
-            h, w, c = frame.shape
+            stats.record(start)
+            item = (frame, time.perf_counter())
+            for slot in slots:
+                slot.put(item)
+    
+    def _inference_loop(self, frames, results, stop, stats):
+        """
+        MediaPipe + classifier on the newest frame; frames that arrive meanwhile
+        are skipped. A frame that raises is logged and shown as an error, and the
+        loop carries on with the next one instead of the thread dying silently.
+        """
+        gesture_history = []
+        errors = 0
+        while not stop.is_set():
+            kind, item = frames.take(timeout=0.1)
+            if kind != 'frame':
+                continue
+            frame, captured_at = item
+            start = time.perf_counter()
+            try:
+                hand_landmarks, gesture_text, gesture_color, confidence = \
+                    self._recognize_live_frame(frame, gesture_history)
+            except Exception:
+                errors += 1
+                if errors == 1 or errors % 100 == 0:  # don't flood the console at camera rate
+                    print(f"Inference error on a live frame ({errors} so far):")
+                    traceback.print_exc()
+                hand_landmarks, gesture_text, gesture_color, confidence = None, "Inference Error", (0, 0, 255), 0.0
+            
+            stats.record(start)
+            results.put({
+                'hand_landmarks': hand_landmarks,
+                'text': gesture_text,
+                'color': gesture_color,
+                'confidence': confidence,
+                'captured_at': captured_at,
+            })
+    
+    def _recognize_live_frame(self, frame, gesture_history, history_size=5):
+        """(hand landmarks to draw, gesture text, color, confidence) for one live frame"""
+        # Extract hand landmarks
+        landmarks, hand_detected, mp_results = self.extract_hand_landmarks(frame)
+        
+        # Predict gesture if hand is detected
+        gesture_text = "No Hand Detected"
+        gesture_color = (128, 128, 128)  # Gray
+        confidence = 0.0
+        
+        if hand_detected and landmarks is not None:
+            if self.model_trained:
+                prediction, confidence = self.classify(landmarks)
+                
+                if prediction is not None and confidence > 0.5:
+                    gesture_text = self.gesture_labels[prediction]
+                    gesture_color = self.gesture_colors[gesture_text]
+                    gesture_history.append(prediction)
+                else:
+                    gesture_text = "Uncertain"
+                    gesture_color = (0, 165, 255)  # Orange
+                    gesture_history.append(-1)
+            else:
+                gesture_text = "Model Not Trained"
+                gesture_color = (0, 165, 255)  # Orange
+        else:
+            self.classify(None)
+            gesture_history.append(-1)
+        
+        # Keep history size limited
+        if len(gesture_history) > history_size:
+            gesture_history.pop(0)
+        
+        return mp_results.multi_hand_landmarks, gesture_text, gesture_color, confidence
+    
+    def _render_loop(self, frames, results, stop, stats, log_interval):
+        """Show every new frame with the most recent result and the per-stage timings"""
+        frame_count = 0
+        result = None
+        last_log = time.perf_counter()
+        while not stop.is_set():
+            kind, item = frames.take(timeout=0.1)
+            if kind != 'frame':
+                # No new frame yet; keep the window responsive
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+                continue
+            start = time.perf_counter()
+            frame_count += 1
             
-            # Extract hand landmarks
-            landmarks, hand_detected, results = self.extract_hand_landmarks(frame)
+            # The inference thread may still be reading this frame, so draw on a copy
+            frame = item[0].copy()
+            h, w, c = frame.shape
+            kind, newer = results.take(timeout=0)
+            if kind == 'frame':
+                result = newer
             
             # Draw hand landmarks
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
+            if result and result['hand_landmarks']:
+                for hand_landmarks in result['hand_landmarks']:
                     self.draw_landmarks(frame, hand_landmarks)
             
-            # Predict gesture if hand is detected
-            gesture_text = "No Hand Detected"
-            gesture_color = (128, 128, 128)  # Gray
-            confidence = 0.0
-            
-            if hand_detected and landmarks is not None:
-                if self.model_trained:
-                    prediction, confidence = self.predict_gesture(landmarks)
-                    
-                    if prediction is not None and confidence > 0.5:
-                        gesture_text = self.gesture_labels[prediction]
-                        gesture_color = self.gesture_colors[gesture_text]
-                        gesture_history.append(prediction)
-                    else:
-                        gesture_text = "Uncertain"
-                        gesture_color = (0, 165, 255)  # Orange
-                        gesture_history.append(-1)
-                else:
-                    gesture_text = "Model Not Trained"
-                    gesture_color = (0, 165, 255)  # Orange
-            else:
-                gesture_history.append(-1)
-            
-            # Keep history size limited
-            if len(gesture_history) > history_size:
-                gesture_history.pop(0)
+            gesture_text = result['text'] if result else "Waiting..."
+            gesture_color = result['color'] if result else (128, 128, 128)
+            confidence = result['confidence'] if result else 0.0
             
             # Draw information on frame
             cv2.rectangle(frame, (10, 10), (630, 100), (0, 0, 0), -1)
@@ -216,6 +441,18 @@ class GestureRecognizer:
             cv2.putText(frame, f"Frame: {frame_count}", (w - 150, 30),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
             
+            # Display per-stage FPS and latency
+            result_age = (time.perf_counter() - result['captured_at']) * 1000 if result else 0.0
+            lines = [f"{name}: {stage.fps():5.1f} fps {stage.latency_ms():6.1f} ms" for name, stage in stats.items()]
+            lines.append(f"result age: {result_age:6.1f} ms")
+            if self.roi is not None:
+                roi = self.roi.stats()
+                lines.append(f"roi crops: {roi['cropped']} full: {roi['full']}  "
+                             f"reused: {self.reused}/{self.reused + self.classified}")
+            for i, line in enumerate(lines):
+                cv2.putText(frame, line, (10, h - 20 - (len(lines) - i) * 18),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.45, (200, 200, 200), 1)
+            
             # Display status
             status_text = "Ready" if self.model_trained else "Training Required"
             status_color = (0, 255, 0) if self.model_trained else (0, 165, 255)
@@ -224,6 +461,11 @@ class GestureRecognizer:
             
             # Show frame
             cv2.imshow('Gesture Recognition', frame)
+            stats['render'].record(start)
+            
+            if time.perf_counter() - last_log >= log_interval:
+                last_log = time.perf_counter()
+                print("  ".join(lines))
             
             # Handle key presses
             key = cv2.waitKey(1) & 0xFF
@@ -234,10 +476,6 @@ class GestureRecognizer:
                 filename = f"gesture_frame_{frame_count}.jpg"
                 cv2.imwrite(filename, frame)
                 print(f"Frame saved: {filename}")
-        
-        cap.release()
-        cv2.destroyAllWindows()
-        print("Live recognition ended.")
     
     def collect_training_data(self, gesture_name, num_samples=30, camera_id=0):
         """Collect training data for a specific gesture"""
@@ -315,8 +553,12 @@ class GestureRecognizer:
             print("\n✗ No data collected")
             return []
     
-    def train_model(self, gestures_to_train=['Thank You', 'Hello', 'I Love You']):
-        """Train the gesture recognition model"""
+    def train_model(self, gestures_to_train=['Thank You', 'Hello', 'I Love You'], feature_spec=None):
+        """
+        Train the gesture recognition model on features.py features
+        (wrist-relative, scale-normalized landmarks + bone angles + fingertip
+        distances unless feature_spec says otherwise)
+        """
         print(f"\n{'='*60}")
         print("MODEL TRAINING")
         print(f"{'='*60}\n")
@@ -339,7 +581,8 @@ class GestureRecognizer:
             print("TRAINING CLASSIFIER")
             print(f"{'='*60}")
             
-            X = np.array(all_landmarks)
+            self.feature_spec = feature_spec or make_spec()
+            X = compute_features(np.array(all_landmarks), self.feature_spec).astype(np.float32)
             y = np.array(all_labels)
             
             print(f"Total samples: {len(X)}")
@@ -366,6 +609,10 @@ class GestureRecognizer:
                 pickle.dump(self.model, f)
             with open(self.scaler_path, 'wb') as f:
                 pickle.dump(self.scaler, f)
+            with open(self.features_path, 'w') as f:
+                json.dump(self.feature_spec, f, indent=2)
+            self._export_forest()
+            self.forest = FlatForest.load(self.forest_path)
             
             self.model_trained = True
             
@@ -375,15 +622,16 @@ class GestureRecognizer:
             print(f"✓ Training accuracy: {train_accuracy:.2%}")
             print(f"✓ Model saved to: {self.model_path}")
             print(f"✓ Scaler saved to: {self.scaler_path}")
+            print(f"✓ Flattened forest saved to: {self.forest_path}")
+            print(f"✓ Feature spec saved to: {self.features_path}")
         else:
             print("\n✗ No training data collected")
 
 
 def main():
     """Main function to run the gesture recognition system"""
-    import sys
-    
-    recognizer = GestureRecognizer()
+    # --adaptive: ROI cropping + reuse the last prediction while the hand is still
+    recognizer = GestureRecognizer(adaptive='--adaptive' in sys.argv)
     
     print("\n" + "="*60)
     print("HAND GESTURE RECOGNITION SYSTEM")
@@ -1,12 +1,12 @@
 """
 Download only the 14 signs we need from WLASL dataset.
 """
-import json
 import os
-import time
-import random
-import urllib.request
-import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from downloader import Downloader, is_youtube, summarize
+from wlasl_index import WLASLIndex
 
 # Our target signs
 TARGET_SIGNS = [
@@ -15,46 +15,9 @@ TARGET_SIGNS = [
 ]
 
 def load_and_filter_json(json_path):
-    """Load WLASL JSON and filter for target signs only."""
-    with open(json_path, 'r') as f:
-        data = json.load(f)
-    
-    filtered = []
-    for entry in data:
-        if entry['gloss'].lower() in TARGET_SIGNS:
-            filtered.append(entry)
-    
-    return filtered
-
-def download_video(url, save_path, video_id):
-    """Download a single video."""
-    if os.path.exists(save_path):
-        print(f"  [SKIP] {video_id} already exists")
-        return True
-    
-    try:
-        if 'youtube' in url or 'youtu.be' in url:
-            # Use yt-dlp for YouTube
-            cmd = f'yt-dlp -q --no-warnings -o "{save_path}" "{url}"'
-            result = subprocess.run(cmd, shell=True, capture_output=True, timeout=60)
-            if result.returncode == 0:
-                print(f"  [OK] {video_id} (YouTube)")
-                return True
-            else:
-                print(f"  [FAIL] {video_id} - yt-dlp error")
-                return False
-        else:
-            # Direct download for other URLs
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            req = urllib.request.Request(url, headers=headers)
-            response = urllib.request.urlopen(req, timeout=30)
-            with open(save_path, 'wb') as f:
-                f.write(response.read())
-            print(f"  [OK] {video_id}")
-            return True
-    except Exception as e:
-        print(f"  [FAIL] {video_id} - {str(e)[:50]}")
-        return False
+    """Filter WLASL for target signs only, via the compiled index (no full JSON parse)."""
+    index = WLASLIndex(json_path)
+    return [{'gloss': gloss, 'instances': index.instances(gloss)} for gloss in TARGET_SIGNS if gloss in index]
 
 def main():
     json_path = 'WLASL_v0.3.json'
@@ -74,41 +37,29 @@ def main():
     total_videos = sum(len(entry['instances']) for entry in filtered_data)
     print(f"Total videos to download: {total_videos}")
     
-    # Download each sign's videos
-    downloaded = 0
-    failed = 0
-    
+    # Download each sign's videos: concurrent, rate-limited per host,
+    # YouTube through yt-dlp, known-dead URLs skipped
+    groups = {}
     for entry in filtered_data:
         gloss = entry['gloss']
         instances = entry['instances']
         
-        # Create subfolder for each sign
+        # Subfolder for each sign (created on the first download)
         sign_folder = os.path.join(save_dir, gloss.lower().replace(' ', '_'))
-        os.makedirs(sign_folder, exist_ok=True)
-        
-        print(f"\n[{gloss.upper()}] - {len(instances)} videos -> {sign_folder}/")
+        print(f"[{gloss.upper()}] - {len(instances)} videos -> {sign_folder}/")
         
+        jobs = []
         for inst in instances:
-            video_id = inst['video_id']
             url = inst['url']
             
             # Determine file extension
-            if 'youtube' in url or 'youtu.be' in url:
-                ext = 'mp4'
-            elif 'aslpro' in url:
-                ext = 'swf'
-            else:
-                ext = 'mp4'
-            
-            save_path = os.path.join(sign_folder, f"{video_id}.{ext}")
-            
-            if download_video(url, save_path, video_id):
-                downloaded += 1
-            else:
-                failed += 1
-            
-            # Be nice to servers
-            time.sleep(random.uniform(0.5, 1.5))
+            ext = 'swf' if 'aslpro' in url and not is_youtube(url) else 'mp4'
+            jobs.append((url, os.path.join(sign_folder, f"{inst['video_id']}.{ext}")))
+        groups[gloss] = jobs
+    
+    counts = summarize(Downloader().run(groups))
+    downloaded = counts.get('ok', 0) + counts.get('exists', 0)
+    failed = counts.get('failed', 0) + counts.get('dead', 0)
     
     print(f"\n{'='*50}")
     print(f"DONE: {downloaded} downloaded, {failed} failed")
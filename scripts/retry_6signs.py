@@ -1,96 +1,42 @@
 """
 Retry downloading missing non-YouTube videos for the 6 target signs.
 """
-import json
 import os
-import time
-import random
-import urllib.request
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from downloader import Downloader, is_youtube, summarize
+from wlasl_index import WLASLIndex
 
 TARGET_SIGNS = ['who', 'help', 'yes', 'what', 'no', 'why']
 DATA_DIR = 'data'
 
-def download_video(url, save_path, video_id):
-    """Download a single video with better error handling."""
-    if os.path.exists(save_path):
-        return "skip"
-    
-    # Skip YouTube - they're all dead
-    if 'youtube' in url or 'youtu.be' in url:
-        return "skip_yt"
-    
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-            'Accept': 'video/mp4,video/*,*/*',
-        }
-        
-        # Handle ASLPro specially
-        if 'aslpro' in url:
-            headers['Referer'] = 'http://www.aslpro.com/cgi-bin/aslpro/aslpro.cgi'
-        
-        req = urllib.request.Request(url, headers=headers)
-        response = urllib.request.urlopen(req, timeout=60)
-        
-        with open(save_path, 'wb') as f:
-            f.write(response.read())
-        
-        # Verify file is not empty/corrupted
-        if os.path.getsize(save_path) < 1000:
-            os.remove(save_path)
-            return "fail"
-        
-        return "ok"
-    except Exception as e:
-        if os.path.exists(save_path):
-            os.remove(save_path)
-        return f"fail: {str(e)[:40]}"
-
 def main():
-    with open('WLASL_v0.3.json') as f:
-        data = json.load(f)
+    index = WLASLIndex()
     
     print("Retrying missing videos for 6 target signs (non-YouTube only)\n")
     
-    total_new = 0
-    total_failed = 0
+    groups = {}
     
-    for entry in data:
-        if entry['gloss'].lower() not in TARGET_SIGNS:
-            continue
-        
-        sign = entry['gloss'].lower()
+    for sign in TARGET_SIGNS:
         sign_dir = os.path.join(DATA_DIR, sign)
         
         downloaded = set(f.replace('.mp4','').replace('.swf','') for f in os.listdir(sign_dir))
-        missing = [inst for inst in entry['instances'] if inst['video_id'] not in downloaded]
-        non_yt_missing = [inst for inst in missing if 'youtube' not in inst['url'] and 'youtu.be' not in inst['url']]
+        missing = [inst for inst in index.instances(sign) if inst['video_id'] not in downloaded]
+        # Skip YouTube - they're all dead
+        non_yt_missing = [inst for inst in missing if not is_youtube(inst['url'])]
         
         if not non_yt_missing:
             print(f"[{sign}] No missing non-YouTube videos")
             continue
         
         print(f"[{sign}] Retrying {len(non_yt_missing)} missing videos...")
-        
-        for inst in non_yt_missing:
-            video_id = inst['video_id']
-            url = inst['url']
-            save_path = os.path.join(sign_dir, f"{video_id}.mp4")
-            
-            result = download_video(url, save_path, video_id)
-            
-            if result == "ok":
-                print(f"  [NEW] {video_id}")
-                total_new += 1
-            elif result == "skip":
-                pass
-            elif result == "skip_yt":
-                pass
-            else:
-                print(f"  [FAIL] {video_id} - {result}")
-                total_failed += 1
-            
-            time.sleep(random.uniform(1.0, 2.0))
+        groups[sign] = [(inst['url'], os.path.join(sign_dir, f"{inst['video_id']}.mp4")) for inst in non_yt_missing]
+    
+    # Transient failures are retried; URLs already known dead are skipped
+    counts = summarize(Downloader().run(groups))
+    total_new = counts.get('ok', 0)
+    total_failed = counts.get('failed', 0) + counts.get('dead', 0)
     
     print(f"\n{'='*50}")
     print(f"New downloads: {total_new}")
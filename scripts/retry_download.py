@@ -1,52 +1,20 @@
 """
 Retry downloading only for signs with less than 10 videos.
 """
-import json
 import os
-import time
-import random
-import urllib.request
-import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from downloader import Downloader
+from wlasl_index import WLASLIndex
 
 # Signs that need more videos (less than 10)
 SIGNS_NEED_MORE = ['hello', 'bye', 'which', 'sorry', 'thank you', 'where', 'please', 'when', 'how']
 
 def load_and_filter_json(json_path):
-    """Load WLASL JSON and filter for signs that need more videos."""
-    with open(json_path, 'r') as f:
-        data = json.load(f)
-    
-    filtered = []
-    for entry in data:
-        if entry['gloss'].lower() in SIGNS_NEED_MORE:
-            filtered.append(entry)
-    
-    return filtered
-
-def download_video(url, save_path, video_id):
-    """Download a single video."""
-    if os.path.exists(save_path):
-        return "skip"
-    
-    try:
-        if 'youtube' in url or 'youtu.be' in url:
-            # Use yt-dlp for YouTube with more retries
-            cmd = f'yt-dlp -q --no-warnings --retries 3 -o "{save_path}" "{url}"'
-            result = subprocess.run(cmd, shell=True, capture_output=True, timeout=90)
-            if result.returncode == 0 and os.path.exists(save_path):
-                return "ok"
-            else:
-                return "fail"
-        else:
-            # Direct download for other URLs
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            req = urllib.request.Request(url, headers=headers)
-            response = urllib.request.urlopen(req, timeout=45)
-            with open(save_path, 'wb') as f:
-                f.write(response.read())
-            return "ok"
-    except Exception as e:
-        return "fail"
+    """Filter WLASL for signs that need more videos, via the compiled index (no full JSON parse)."""
+    index = WLASLIndex(json_path)
+    return [{'gloss': gloss, 'instances': index.instances(gloss)} for gloss in SIGNS_NEED_MORE if gloss in index]
 
 def get_current_count(sign_folder):
     """Get current video count for a sign."""
@@ -67,7 +35,7 @@ def main():
     filtered_data = load_and_filter_json(json_path)
     print(f"Retrying downloads for {len(filtered_data)} signs that need more videos\n")
     
-    total_new = 0
+    groups, need, before = {}, {}, {}
     
     for entry in filtered_data:
         gloss = entry['gloss']
@@ -86,34 +54,20 @@ def main():
         
         print(f"[{gloss.upper()}] Has {current_count}, needs {needed} more")
         
-        new_downloads = 0
-        for inst in instances:
-            if new_downloads >= needed:
-                break
-                
-            video_id = inst['video_id']
-            url = inst['url']
-            
-            # Determine file extension
-            ext = 'mp4'
-            save_path = os.path.join(sign_folder, f"{video_id}.{ext}")
-            
-            result = download_video(url, save_path, video_id)
-            
-            if result == "ok":
-                print(f"  [NEW] {video_id}")
-                new_downloads += 1
-                total_new += 1
-            elif result == "skip":
-                pass  # Already exists
-            else:
-                print(f"  [FAIL] {video_id}")
-            
-            # Be nice to servers
-            time.sleep(random.uniform(0.8, 2.0))
-        
-        final_count = get_current_count(sign_folder)
-        print(f"  -> Now has {final_count} videos\n")
+        # Candidates in order; the downloader stops the sign once `needed` succeed
+        paths = [(inst['url'], os.path.join(sign_folder, f"{inst['video_id']}.mp4")) for inst in instances]
+        groups[gloss] = [(url, path) for url, path in paths if not os.path.exists(path)]
+        need[gloss] = needed
+        before[gloss] = current_count
+    
+    # YouTube through yt-dlp with retries; known-dead URLs are skipped
+    Downloader().run(groups, need=need)
+    
+    total_new = 0
+    for gloss in groups:
+        final_count = get_current_count(os.path.join(save_dir, gloss.lower().replace(' ', '_')))
+        total_new += final_count - before[gloss]
+        print(f"  [{gloss.upper()}] -> Now has {final_count} videos")
     
     print(f"{'='*50}")
     print(f"DONE: {total_new} new videos downloaded")
@@ -0,0 +1,262 @@
+"""
+Per-session landmark buffers with bounded memory
+Each session holds a preallocated (30, 63) float32 ring buffer instead of a
+deque of Python lists. Sessions are evicted after an idle TTL and, past
+max_sessions, in least-recently-used order, so clients can't grow the
+server without bound.
+
+Both stores share one interface:
+    append(session_id, row) -> (window or None, frames buffered)
+    reset(session_id)
+    stats()
+MemorySessionStore keeps buffers in-process; RedisSessionStore keeps them
+in any Redis-compatible server so several worker processes can share them.
+SessionStateMap bounds other per-session objects a process keeps (ROI
+boxes, streaming state) the same way, whichever store holds the buffers.
+The window is a (30, 63) float32 array once the buffer is full, owned by
+the caller: the memory store copies it out of the ring under its lock, so
+a concurrent append to the same session can't shift it mid-read.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class LandmarkRing:
+    """
+    Fixed-size float32 ring buffer of landmark frames.
+
+    Every row is written twice, at pos and pos + length, so the frames in
+    order oldest to newest are always the contiguous slice
+    data[pos:pos + length]. The model gets that slice as a view instead of
+    a window rebuilt from the ring on every request.
+    """
+
+    def __init__(self, length, dim):
+        self.length = length
+        self.data = np.zeros((2 * length, dim), dtype=np.float32)
+        self.pos = 0  # oldest frame once full, next slot to write
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def append(self, row):
+        self.data[self.pos] = row
+        self.data[self.pos + self.length] = row
+        self.pos = (self.pos + 1) % self.length
+        self.count = min(self.count + 1, self.length)
+
+    def window(self):
+        """(length, dim) view of the frames oldest to newest; only meaningful once full"""
+        return self.data[self.pos:self.pos + self.length]
+
+    def clear(self):
+        self.pos = 0
+        self.count = 0
+
+
+class _Session:
+    __slots__ = ('ring', 'last_used')
+
+    def __init__(self, ring):
+        self.ring = ring
+        self.last_used = time.monotonic()
+
+
+class MemorySessionStore:
+    """In-process session buffers with idle-TTL and LRU eviction"""
+
+    def __init__(self, length, dim, idle_ttl=300.0, max_sessions=10000, on_evict=None):
+        self.length = length
+        self.dim = dim
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.on_evict = on_evict  # called with each evicted session_id
+        self.created = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + idle_ttl
+
+    def _expire(self, now):
+        """Pop idle and over-cap sessions; caller holds the lock"""
+        evicted = []
+        if now >= self._next_sweep:
+            self._next_sweep = now + min(self.idle_ttl, 10.0)
+            # OrderedDict is in LRU order, so idle sessions are at the front
+            while self._sessions:
+                sid, session = next(iter(self._sessions.items()))
+                if now - session.last_used <= self.idle_ttl:
+                    break
+                del self._sessions[sid]
+                evicted.append(sid)
+            self.evicted_idle += len(evicted)
+        while len(self._sessions) > self.max_sessions:
+            evicted.append(self._sessions.popitem(last=False)[0])
+            self.evicted_lru += 1
+        return evicted
+
+    def _notify(self, evicted):
+        if self.on_evict is not None:
+            for sid in evicted:
+                self.on_evict(sid)
+
+    def append(self, session_id, row):
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session(LandmarkRing(self.length, self.dim))
+                self.created += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_used = now
+            ring = session.ring
+            ring.append(row)
+            count = len(ring)
+            # Copied while locked: another request for this session may append as soon as the lock drops
+            window = ring.window().copy() if count == self.length else None
+            evicted = self._expire(now)
+        self._notify(evicted)
+        return window, count
+
+    def reset(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.ring.clear()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        with self._lock:
+            active = len(self._sessions)
+        ring_bytes = 2 * self.length * self.dim * 4
+        return {
+            'backend': 'memory',
+            'active': active,
+            'created': self.created,
+            'evicted_idle': self.evicted_idle,
+            'evicted_lru': self.evicted_lru,
+            'total_bytes': active * ring_bytes,
+            'idle_ttl': self.idle_ttl,
+            'max_sessions': self.max_sessions,
+        }
+
+
+class SessionStateMap:
+    """
+    Per-session objects created on first use, with the same idle-TTL and
+    LRU eviction as MemorySessionStore but independent of the buffer store.
+    An evicted session simply gets a fresh object from factory() next time.
+    """
+
+    def __init__(self, factory, idle_ttl=300.0, max_sessions=10000):
+        self.factory = factory
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.evicted = 0
+        self._items = OrderedDict()  # session_id -> [value, last_used], LRU first
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + idle_ttl
+
+    def get(self, session_id):
+        """The session's object, created if missing"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(session_id)
+            if item is None:
+                item = self._items[session_id] = [self.factory(), now]
+            else:
+                self._items.move_to_end(session_id)
+                item[1] = now
+            self._expire(now)
+            return item[0]
+
+    def peek(self, session_id):
+        """The session's object if it exists; doesn't create or touch it"""
+        with self._lock:
+            item = self._items.get(session_id)
+            return item[0] if item is not None else None
+
+    def pop(self, session_id):
+        with self._lock:
+            item = self._items.pop(session_id, None)
+            return item[0] if item is not None else None
+
+    def _expire(self, now):
+        """Caller holds the lock"""
+        if now >= self._next_sweep:
+            self._next_sweep = now + min(self.idle_ttl, 10.0)
+            while self._items:
+                sid, (_, last_used) = next(iter(self._items.items()))
+                if now - last_used <= self.idle_ttl:
+                    break
+                del self._items[sid]
+                self.evicted += 1
+        while len(self._items) > self.max_sessions:
+            self._items.popitem(last=False)
+            self.evicted += 1
+
+    def values(self):
+        with self._lock:
+            return [value for value, _ in self._items.values()]
+
+    def __len__(self):
+        return len(self._items)
+
+
+class RedisSessionStore:
+    """
+    Session buffers in a Redis-compatible server, shared by worker processes.
+
+    Each session is a list of float32 frame rows under handly:session:<id>,
+    trimmed to the window length and expired after idle_ttl in the same
+    MULTI/EXEC as the append. The session cap is delegated to the server:
+    run it with maxmemory and an allkeys-lru policy.
+    """
+
+    def __init__(self, url, length, dim, idle_ttl=300.0, prefix='handly:session:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.length = length
+        self.dim = dim
+        self.idle_ttl = idle_ttl
+        self.prefix = prefix
+        self.appends = 0
+
+    def append(self, session_id, row):
+        key = self.prefix + session_id
+        row = np.asarray(row, dtype=np.float32).reshape(self.dim)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.rpush(key, row.tobytes())
+        pipe.ltrim(key, -self.length, -1)
+        pipe.expire(key, max(1, int(self.idle_ttl)))
+        pipe.lrange(key, 0, -1)
+        rows = pipe.execute()[-1]
+        self.appends += 1
+        if len(rows) < self.length:
+            return None, len(rows)
+        return np.frombuffer(b''.join(rows), dtype=np.float32).reshape(self.length, self.dim), len(rows)
+
+    def reset(self, session_id):
+        self.client.delete(self.prefix + session_id)
+
+    def stats(self):
+        active = sum(1 for _ in self.client.scan_iter(match=self.prefix + '*', count=1000))
+        return {
+            'backend': 'redis',
+            'active': active,
+            'appends': self.appends,
+            'total_bytes': active * self.length * self.dim * 4,
+            'idle_ttl': self.idle_ttl,
+        }
@@ -1,17 +1,23 @@
 """
 Quick setup script - downloads videos, extracts landmarks, trains model
 For signs: help, no, yes
+
+Usage: python setup.py [--workers N] [--target-fps F | --stride N] [--max-side PX] [--max-frames N]
+                       [--features raw] [--float16]
 """
-import json
+import argparse
 import os
-import urllib.request
 import ssl
-import cv2
-import numpy as np
-import mediapipe as mp
 from collections import defaultdict
 import pickle
 
+from dataset_store import TEST, TRAIN, DatasetStore, assign_split
+from downloader import Downloader, is_youtube, summarize
+from extraction import MIN_FRAMES, extract_all, extractor_params, list_videos, plan_extraction
+from feature_cache import FeatureCache
+from features import compute_features, feature_dim, feature_dtype, make_spec
+from wlasl_index import WLASLIndex
+
 # Disable SSL verification for problematic URLs
 ssl._create_default_https_context = ssl._create_unverified_context
 
@@ -19,160 +25,175 @@ SIGNS = ['help', 'no', 'yes']
 DATA_DIR = 'data'
 PROCESSED_DIR = 'processed'
 MODELS_DIR = 'models'
+CACHE_DIR = f'{PROCESSED_DIR}/cache'
+DATASET_DIR = f'{PROCESSED_DIR}/dataset'
+SEQUENCE_LENGTH = 30
 
-# Create directories
-for d in [DATA_DIR, PROCESSED_DIR, MODELS_DIR]:
-    os.makedirs(d, exist_ok=True)
-for sign in SIGNS:
-    os.makedirs(f'{DATA_DIR}/{sign}', exist_ok=True)
-
-print("=" * 50)
-print("STEP 1: Downloading videos")
-print("=" * 50)
-
-# Load WLASL data
-with open('WLASL_v0.3.json', 'r') as f:
-    wlasl = json.load(f)
-
-# Find videos for our signs
-for entry in wlasl:
-    gloss = entry['gloss'].lower()
-    if gloss in SIGNS:
-        for inst in entry['instances'][:15]:  # Get up to 15 per sign
-            vid_id = inst['video_id']
-            url = inst.get('url', '')
-            
-            if not url or 'youtube' in url.lower():
-                continue
-                
-            out_path = f'{DATA_DIR}/{gloss}/{vid_id}.mp4'
-            if os.path.exists(out_path):
-                continue
-                
-            try:
-                urllib.request.urlretrieve(url, out_path)
-                print(f"✓ {gloss}/{vid_id}.mp4")
-            except:
-                pass
-
-# Count downloads
-for sign in SIGNS:
-    count = len([f for f in os.listdir(f'{DATA_DIR}/{sign}') if f.endswith('.mp4')])
-    print(f"{sign}: {count} videos")
-
-print("\n" + "=" * 50)
-print("STEP 2: Extracting landmarks")
-print("=" * 50)
-
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(static_image_mode=True, max_num_hands=1, min_detection_confidence=0.5)
-
-os.makedirs(f'{PROCESSED_DIR}/landmarks', exist_ok=True)
-
-for sign in SIGNS:
-    sign_dir = f'{DATA_DIR}/{sign}'
-    out_dir = f'{PROCESSED_DIR}/landmarks/{sign}'
-    os.makedirs(out_dir, exist_ok=True)
-    
-    videos = [f for f in os.listdir(sign_dir) if f.endswith('.mp4')]
-    
-    for vid_file in videos:
-        vid_path = os.path.join(sign_dir, vid_file)
-        out_path = os.path.join(out_dir, vid_file.replace('.mp4', '.npy'))
-        
-        if os.path.exists(out_path):
-            continue
-        
-        cap = cv2.VideoCapture(vid_path)
-        landmarks_seq = []
-        
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = hands.process(rgb)
-            
-            if results.multi_hand_landmarks:
-                hand = results.multi_hand_landmarks[0]
-                frame_landmarks = []
-                for lm in hand.landmark:
-                    frame_landmarks.extend([lm.x, lm.y, lm.z])
-                landmarks_seq.append(frame_landmarks)
-        
-        cap.release()
-        
-        if len(landmarks_seq) >= 5:
-            np.save(out_path, np.array(landmarks_seq))
-            print(f"✓ {sign}/{vid_file}")
-
-hands.close()
-
-print("\n" + "=" * 50)
-print("STEP 3: Preparing dataset")
-print("=" * 50)
 
-SEQUENCE_LENGTH = 30
-X, y = [], []
-
-for idx, sign in enumerate(SIGNS):
-    lm_dir = f'{PROCESSED_DIR}/landmarks/{sign}'
-    if not os.path.exists(lm_dir):
-        continue
-    
-    for f in os.listdir(lm_dir):
-        if not f.endswith('.npy'):
-            continue
-        
-        seq = np.load(os.path.join(lm_dir, f))
-        
-        # Pad or truncate
-        if len(seq) < SEQUENCE_LENGTH:
-            pad = np.zeros((SEQUENCE_LENGTH - len(seq), 63))
-            seq = np.vstack([seq, pad])
-        else:
-            seq = seq[:SEQUENCE_LENGTH]
-        
-        X.append(seq)
-        y.append(idx)
-
-X = np.array(X)
-y = np.array(y)
-
-print(f"Dataset: {X.shape[0]} samples, {len(SIGNS)} classes")
-
-# Save
-from sklearn.model_selection import train_test_split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-
-with open(f'{PROCESSED_DIR}/dataset.pkl', 'wb') as f:
-    pickle.dump({'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test}, f)
-
-with open(f'{MODELS_DIR}/label_map.pkl', 'wb') as f:
-    pickle.dump({'signs': SIGNS}, f)
-
-print("\n" + "=" * 50)
-print("STEP 4: Training model")
-print("=" * 50)
-
-import tensorflow as tf
-from tensorflow import keras
-
-model = keras.Sequential([
-    keras.layers.LSTM(64, return_sequences=True, input_shape=(30, 63)),
-    keras.layers.Dropout(0.2),
-    keras.layers.LSTM(32),
-    keras.layers.Dropout(0.2),
-    keras.layers.Dense(32, activation='relu'),
-    keras.layers.Dense(len(SIGNS), activation='softmax')
-])
-
-model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
-model.fit(X_train, y_train, epochs=50, batch_size=8, validation_split=0.2, verbose=1)
-model.save(f'{MODELS_DIR}/sign_classifier.keras')
-
-print("\n" + "=" * 50)
-print("DONE! Model saved to models/sign_classifier.keras")
-print("=" * 50)
+def download_videos(workers):
+    print("=" * 50)
+    print("STEP 1: Downloading videos")
+    print("=" * 50)
 
+    # Find videos for our signs (compiled WLASL index, rebuilt if the JSON changed)
+    index = WLASLIndex()
+    groups = defaultdict(list)
+    for gloss in SIGNS:
+        for inst in index.instances(gloss)[:15]:  # Get up to 15 per sign
+            url = inst.get('url') or ''
+            if not url or is_youtube(url):
+                continue
+            groups[gloss].append((url, f'{DATA_DIR}/{gloss}/{inst["video_id"]}.mp4'))
+
+    # Concurrent, resumable; URLs that are known dead are skipped without a request
+    results = Downloader(workers=workers).run(groups)
+    print(f"Downloads: {summarize(results)}")
+
+    # Count downloads
+    for sign in SIGNS:
+        count = len([f for f in os.listdir(f'{DATA_DIR}/{sign}') if f.endswith('.mp4')])
+        print(f"{sign}: {count} videos")
+
+
+def extract_landmarks(workers, gc=False, **options):
+    print("\n" + "=" * 50)
+    print("STEP 2: Extracting landmarks")
+    print("=" * 50)
+
+    # Cached per (video content, extractor config): only new or invalidated videos run
+    cache = FeatureCache(CACHE_DIR)
+    videos = list_videos(DATA_DIR, SIGNS)
+    params = extractor_params(**options)
+    keys, tasks = plan_extraction(videos, cache, params)
+    print(f"{len(videos)} videos, {len(videos) - len(tasks)} cached, {len(tasks)} to extract on {workers} worker(s)")
+    saved, too_short, failed = extract_all(tasks, workers, cache, **options)
+    print(f"Saved {saved}, too few hand frames {too_short}, failed {failed}")
+
+    if gc:
+        removed, freed = cache.gc(set(keys))
+        print(f"Cache GC: removed {removed} files ({freed / 1e6:.1f} MB)")
+    return [(sign, key) for (sign, _), key in zip(videos, keys)], cache, params
+
+
+def new_sequences(entries, cache, store, spec):
+    """(key, features, label, split) for cached entries not in the store yet"""
+    seen = set()
+    for sign, key in entries:
+        if key in store or key in seen or not cache.has(key):
+            continue  # already stored, a duplicate video, or extraction failed
+        seen.add(key)
+        meta = cache.metadata(key)
+        if meta['frames'] < MIN_FRAMES:
+            continue
+        yield key, compute_features(cache.load(key), spec), SIGNS.index(sign), assign_split(meta['sha256'])
+
+
+def prepare_dataset(entries, cache, params, spec):
+    print("\n" + "=" * 50)
+    print("STEP 3: Preparing dataset")
+    print("=" * 50)
+
+    # The cache holds raw landmarks; features are computed here, so changing
+    # them rebuilds the store without re-running MediaPipe.
+    # Reset automatically when the extractor config, features or sign list change
+    store = DatasetStore(DATASET_DIR, dim=feature_dim(spec), classes=SIGNS, params=dict(params, features=spec),
+                         dtype=feature_dtype(spec))
+    current = {key for _, key in entries}
+    if any(key not in current for key in store.keys):
+        store.clear()  # videos were removed: rebuild from the cache
+    added = store.append_many(new_sequences(entries, cache, store, spec))
+    train = len(store.indices(TRAIN))
+    print(f"Dataset: {len(store)} samples ({added} new), {len(SIGNS)} classes, "
+          f"{train} train / {len(store) - train} test")
+
+    with open(f'{MODELS_DIR}/label_map.pkl', 'wb') as f:
+        pickle.dump({'signs': SIGNS, 'features': spec}, f)
+
+    return store
+
+
+def train_model(store):
+    print("\n" + "=" * 50)
+    print("STEP 4: Training model")
+    print("=" * 50)
+
+    from training import make_dataset, split_validation
+
+    # Streams random 30-frame crops from the mapped store each epoch
+    train, val = split_validation(store.indices(TRAIN))
+    train_ds = make_dataset(store, train, SEQUENCE_LENGTH, batch_size=8, training=True)
+    val_ds = make_dataset(store, val, SEQUENCE_LENGTH, batch_size=8, training=False) if len(val) else None
+
+    model = build_model(store.dim)
+    model.fit(train_ds, validation_data=val_ds, epochs=50, verbose=1)
+    model.save(f'{MODELS_DIR}/sign_classifier.keras')
+
+    test = store.indices(TEST)
+    if len(test):
+        _, accuracy = model.evaluate(make_dataset(store, test, SEQUENCE_LENGTH, training=False), verbose=0)
+        print(f"Test accuracy: {accuracy:.3f} ({len(test)} videos)")
+
+    print("\n" + "=" * 50)
+    print("DONE! Model saved to models/sign_classifier.keras")
+    print("=" * 50)
+
+
+def build_model(dim=63):
+    from tensorflow import keras
+
+    model = keras.Sequential([
+        keras.layers.LSTM(64, return_sequences=True, input_shape=(SEQUENCE_LENGTH, dim)),
+        keras.layers.Dropout(0.2),
+        keras.layers.LSTM(32),
+        keras.layers.Dropout(0.2),
+        keras.layers.Dense(32, activation='relu'),
+        keras.layers.Dense(len(SIGNS), activation='softmax')
+    ])
+
+    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+
+def add_feature_args(parser):
+    parser.add_argument('--features', choices=['normalized', 'raw'], default='normalized',
+                        help="normalized: wrist-relative, scale-normalized landmarks + bone angles + fingertip "
+                             "distances (see features.py); raw: MediaPipe x/y/z as-is")
+    parser.add_argument('--float16', action='store_true', help="store features in half precision")
+
+
+def feature_spec(args):
+    normalized = args.features == 'normalized'
+    return make_spec(normalize=normalized, angles=normalized, distances=normalized, float16=args.float16)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download videos, extract landmarks and train the model")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="landmark extraction processes (one MediaPipe Hands each)")
+    parser.add_argument('--download-workers', type=int, default=8, help="concurrent video downloads")
+    parser.add_argument('--stride', type=int, default=1, help="run MediaPipe on every Nth frame")
+    parser.add_argument('--target-fps', type=float, help="derive the stride per video from its FPS (overrides --stride)")
+    parser.add_argument('--max-side', type=int, help="downscale frames whose longer side exceeds this")
+    parser.add_argument('--max-frames', type=int,
+                        help=f"stop a video once this many hand frames are found (training uses {SEQUENCE_LENGTH})")
+    parser.add_argument('--gc', action='store_true',
+                        help="delete cached landmarks not used by this run (other configs, removed videos)")
+    add_feature_args(parser)
+    args = parser.parse_args()
+    spec = feature_spec(args)
+
+    # Create directories
+    for d in [DATA_DIR, PROCESSED_DIR, MODELS_DIR]:
+        os.makedirs(d, exist_ok=True)
+    for sign in SIGNS:
+        os.makedirs(f'{DATA_DIR}/{sign}', exist_ok=True)
+
+    download_videos(args.download_workers)
+    entries, cache, params = extract_landmarks(args.workers, gc=args.gc, stride=args.stride, target_fps=args.target_fps,
+                                       max_side=args.max_side, max_frames=args.max_frames)
+    store = prepare_dataset(entries, cache, params, spec)
+    train_model(store)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Helpers for the persistent WebSocket stream (/ws)
+The socket reader only parks raw messages in a one-slot mailbox; the
+handler decodes and runs inference on whatever is newest. If inference
+falls behind, unprocessed frames are overwritten (dropped) instead of
+queueing up, so latency stays bounded at the cost of skipped frames.
+"""
+import json
+import threading
+
+
+class LatestFrameSlot:
+    """One-slot mailbox: a newer frame replaces an older unprocessed one"""
+
+    def __init__(self):
+        self.received = 0
+        self.dropped = 0
+        self._frame = None
+        self._reset = False
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, message):
+        with self._cond:
+            self.received += 1
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = message
+            self._cond.notify()
+
+    def request_reset(self):
+        """Resets are never dropped; frames received before them are"""
+        with self._cond:
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = None
+            self._reset = True
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def take(self, timeout=None):
+        """
+        Block for the next item: ('reset', None), ('frame', message), or
+        (None, None) once closed or when nothing arrives within timeout seconds
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._frame is not None or self._reset or self._closed, timeout)
+            if self._reset:
+                self._reset = False
+                return 'reset', None
+            if self._frame is not None:
+                message, self._frame = self._frame, None
+                return 'frame', message
+            return None, None
+
+
+def prediction_changed(last, result, min_confidence_delta=0.05):
+    """Push only when the label, readiness or hand state changes, or confidence moves noticeably"""
+    if last is None:
+        return True
+    if (last['prediction'], last['ready'], last['hand_detected']) != \
+            (result['prediction'], result['ready'], result['hand_detected']):
+        return True
+    return abs(result['confidence'] - last['confidence']) >= min_confidence_delta
+
+
+def is_reset_message(message):
+    """Resets are tiny JSON texts; anything long is a frame and isn't parsed twice"""
+    if not isinstance(message, str) or len(message) > 64:
+        return False
+    try:
+        return json.loads(message).get('type') == 'reset'
+    except (ValueError, AttributeError):
+        return False
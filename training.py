@@ -0,0 +1,67 @@
+"""
+Streaming tf.data input pipeline over the consolidated DatasetStore
+Sequences are read lazily from the memory-mapped store on parallel map
+calls, and each epoch takes a fresh random 30-frame crop of every sequence
+(zero-padded when shorter) in the TF graph instead of training on a fixed
+seq[:30] truncation. Batches are prefetched while the model trains.
+
+Loaded sequences are cached in memory only while the selected data fits in
+cache_bytes; past that every epoch re-reads the mapped file, so memory
+stays flat as the vocabulary grows.
+"""
+import numpy as np
+import tensorflow as tf
+
+CACHE_BYTES = 256 * 1024 * 1024
+
+
+def split_validation(indices, fraction=0.2, seed=0):
+    """Fixed (train, validation) split of the training indices"""
+    shuffled = np.random.default_rng(seed).permutation(indices)
+    n_val = int(round(len(shuffled) * fraction))
+    return np.sort(shuffled[n_val:]), np.sort(shuffled[:n_val])
+
+
+def make_dataset(store, indices, length=30, batch_size=8, training=True, cache_bytes=CACHE_BYTES, seed=None):
+    """
+    Batches of ((batch, length, dim) float32 windows, labels) for `indices`
+    of the store. Training shuffles and crops at a random start each epoch;
+    evaluation takes the first `length` frames like the old truncation.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    labels = np.asarray(store.labels[indices], dtype=np.int32)
+    lengths = store.lengths()[indices]
+    cache = int(lengths.sum()) * store.dim * 4 <= cache_bytes
+
+    def load(i):
+        return np.array(store.sequence(i), dtype=np.float32)
+
+    def read(i, label):
+        seq = tf.numpy_function(load, [i], tf.float32, stateful=False)
+        seq.set_shape([None, store.dim])
+        return seq, label
+
+    def crop(seq, label):
+        n = tf.shape(seq)[0]
+        if training:
+            start = tf.random.uniform([], 0, tf.maximum(n - length, 0) + 1, dtype=tf.int32, seed=seed)
+        else:
+            start = 0
+        window = seq[start:start + length]
+        window = tf.pad(window, [[0, length - tf.shape(window)[0]], [0, 0]])
+        window.set_shape([length, store.dim])
+        return window, label
+
+    ds = tf.data.Dataset.from_tensor_slices((indices, labels))
+    if cache:
+        # Small enough to keep: read once, then shuffle the loaded sequences
+        ds = ds.map(read, num_parallel_calls=tf.data.AUTOTUNE).cache()
+        if training:
+            ds = ds.shuffle(len(indices), seed=seed, reshuffle_each_iteration=True)
+    else:
+        # Shuffle only the indices so the shuffle buffer never holds sequences
+        if training:
+            ds = ds.shuffle(len(indices), seed=seed, reshuffle_each_iteration=True)
+        ds = ds.map(read, num_parallel_calls=tf.data.AUTOTUNE, deterministic=not training)
+    ds = ds.map(crop, num_parallel_calls=tf.data.AUTOTUNE, deterministic=not training)
+    return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,116 @@
+"""
+Compiled index of WLASL_v0.3.json
+The metadata JSON is parsed once into an SQLite table clustered by gloss,
+next to the JSON (WLASL_v0.3.json.sqlite). Scripts then open the index and
+look glosses up directly instead of loading and scanning the whole file on
+every run. The index records the JSON's size and mtime and is rebuilt
+automatically when the JSON changes.
+
+Usage: python wlasl_index.py [gloss ...]   # build, then time lookups
+"""
+import json
+import os
+import sqlite3
+import sys
+import time
+
+WLASL_JSON = 'WLASL_v0.3.json'
+# Instance fields stored as columns; bbox is kept as JSON text
+FIELDS = ('video_id', 'url', 'split', 'bbox', 'fps', 'frame_start', 'frame_end',
+          'signer_id', 'source', 'instance_id', 'variation_id')
+
+
+class WLASLIndex:
+    """Gloss -> instances lookups over a compiled copy of the WLASL JSON"""
+
+    def __init__(self, json_path=WLASL_JSON, index_path=None):
+        self.json_path = json_path
+        self.index_path = index_path or json_path + '.sqlite'
+        if not self._fresh():
+            self.build()
+        self.db = sqlite3.connect(self.index_path)
+
+    def _source_stamp(self):
+        st = os.stat(self.json_path)
+        return f'{st.st_size}:{st.st_mtime_ns}'
+
+    def _fresh(self):
+        if not os.path.exists(self.index_path):
+            return False
+        try:
+            with sqlite3.connect(self.index_path) as db:
+                row = db.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        except sqlite3.DatabaseError:
+            return False
+        return row is not None and row[0] == self._source_stamp()
+
+    def build(self):
+        """Parse the JSON once and write the index atomically"""
+        with open(self.json_path) as f:
+            wlasl = json.load(f)
+        tmp_path = self.index_path + '.tmp'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        db = sqlite3.connect(tmp_path)
+        db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        db.execute(f"CREATE TABLE instances (gloss TEXT, position INTEGER, {', '.join(FIELDS)}, "
+                   "PRIMARY KEY (gloss, position)) WITHOUT ROWID")
+        rows = []
+        for entry in wlasl:
+            gloss = entry['gloss'].lower()
+            for inst in entry['instances']:
+                values = [inst.get(field) for field in FIELDS]
+                values[FIELDS.index('bbox')] = json.dumps(inst.get('bbox'))
+                rows.append((gloss, len(rows), *values))  # file order, unique even for repeated glosses
+        db.executemany(f"INSERT INTO instances VALUES ({', '.join('?' * (len(FIELDS) + 2))})", rows)
+        db.execute("INSERT INTO meta VALUES ('source', ?)", (self._source_stamp(),))
+        db.commit()
+        db.close()
+        os.replace(tmp_path, self.index_path)
+
+    def instances(self, gloss):
+        """The gloss's instances in JSON order, as dicts with the JSON's field names"""
+        rows = self.db.execute(f"SELECT {', '.join(FIELDS)} FROM instances WHERE gloss = ? ORDER BY position",
+                               (gloss.lower(),)).fetchall()
+        result = []
+        for row in rows:
+            inst = dict(zip(FIELDS, row))
+            inst['bbox'] = json.loads(inst['bbox'])
+            result.append(inst)
+        return result
+
+    def glosses(self):
+        return [row[0] for row in self.db.execute("SELECT DISTINCT gloss FROM instances ORDER BY gloss")]
+
+    def __contains__(self, gloss):
+        return self.db.execute("SELECT 1 FROM instances WHERE gloss = ? LIMIT 1", (gloss.lower(),)).fetchone() is not None
+
+    def close(self):
+        self.db.close()
+
+
+def main():
+    glosses = sys.argv[1:] or ['hello', 'help', 'yes', 'no']
+
+    start = time.perf_counter()
+    with open(WLASL_JSON) as f:
+        wlasl = json.load(f)
+    found = {e['gloss'].lower(): len(e['instances']) for e in wlasl if e['gloss'].lower() in glosses}
+    json_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    index = WLASLIndex()
+    open_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    indexed = {g: len(index.instances(g)) for g in glosses if g in index}
+    lookup_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{index.index_path}: {len(index.glosses())} glosses")
+    print(f"json.load + scan: {json_ms:8.1f} ms")
+    print(f"index open:       {open_ms:8.1f} ms (includes a rebuild if the JSON changed)")
+    print(f"{len(glosses)} lookups:       {lookup_ms:8.1f} ms")
+    print(f"same instances: {found == indexed}  {indexed}")
+
+
+if __name__ == '__main__':
+    main()